@@ -0,0 +1,186 @@
+"""
+Local fixture site and stub Laravel receiver for the benchmarks.
+
+Both are plain http.server servers on 127.0.0.1, so a run needs no network
+access (only a locally installed Chromium for the browser crawlers).
+"""
+import gzip
+import json
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ITEMS_PER_PAGE = 20
+SEED_LINKS = 200
+_SESSION = "bench-session"
+
+
+def _page(title, body, script=""):
+    return (
+        "<!doctype html><html><head><meta charset='utf-8'>"
+        f"<title>{title}</title></head><body><h1>{title}</h1>{body}"
+        f"{f'<script>{script}</script>' if script else ''}</body></html>"
+    )
+
+
+def _items(prefix, start, count):
+    return "".join(
+        f"<div class='item'><h2>{prefix} item {i}</h2><p class='price'>{i * 3 % 97}.99</p>"
+        f"<p class='desc'>Description of {prefix} item {i}, long enough to look like a listing.</p></div>"
+        for i in range(start, start + count)
+    )
+
+
+# Appends a batch of items whenever the sentinel scrolls into view, up to `total`
+_SCROLL_JS = """
+const total = %d, batch = %d;
+let loaded = batch;
+const sentinel = document.getElementById('sentinel');
+new IntersectionObserver(entries => {
+    if (!entries[0].isIntersecting || loaded >= total) return;
+    setTimeout(() => {
+        const list = document.getElementById('list');
+        for (let i = loaded; i < Math.min(loaded + batch, total); i++) {
+            const div = document.createElement('div');
+            div.className = 'item';
+            div.innerHTML = '<h2>scroll item ' + i + '</h2><p class="price">' + (i * 3 %% 97) + '.99</p>';
+            list.appendChild(div);
+        }
+        loaded += batch;
+    }, 100);
+}).observe(sentinel);
+"""
+
+
+class FixtureSite(BaseHTTPRequestHandler):
+    """
+    /static/<n>              listing page with ITEMS_PER_PAGE items
+    /scroll/<n>              infinite scroll, items appended on scroll
+    /paged/<n>?page=<k>      page k of a `pages`-page listing with a.next links
+    /seed/<n>                SEED_LINKS links to other seed and static pages
+    /login, /account/<n>     form login setting a cookie, pages behind it
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+    first_seen = {}  # path -> monotonic time of its first request
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body and "Content-Type" not in (headers or {}):
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _logged_in(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        return "session" in cookie and cookie["session"].value == _SESSION
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        with self.lock:
+            self.first_seen.setdefault(self.path, time.monotonic())
+
+        if not parts:
+            return self._send(200, _page("Bench fixtures", "").encode())
+        kind, number = parts[0], int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+
+        if kind == "static":
+            html = _page(f"Static {number}", f"<div id='list'>{_items('static', 0, ITEMS_PER_PAGE)}</div>")
+        elif kind == "scroll":
+            total = int(parse_qs(url.query).get("items", ["100"])[0])
+            html = _page(
+                f"Scroll {number}",
+                f"<div id='list'>{_items('scroll', 0, ITEMS_PER_PAGE)}</div><div id='sentinel' style='height:10px'></div>",
+                _SCROLL_JS % (total, ITEMS_PER_PAGE)
+            )
+        elif kind == "paged":
+            query = parse_qs(url.query)
+            page = int(query.get("page", ["1"])[0])
+            pages = int(query.get("pages", ["10"])[0])
+            nav = f"<a class='next' href='/paged/{number}?pages={pages}&page={page + 1}'>Next</a>" if page < pages else ""
+            html = _page(f"Paged {number} page {page}", f"<div id='list'>{_items(f'page {page}', 0, ITEMS_PER_PAGE)}</div>{nav}")
+        elif kind == "seed":
+            links = "".join(
+                f"<li><a href='/{'seed' if i % 2 else 'static'}/{(number * SEED_LINKS + i) % 5000}?utm_source=bench#top'>Link {i}</a></li>"
+                for i in range(SEED_LINKS)
+            )
+            html = _page(f"Seed {number}", f"<ul id='links'>{links}</ul>")
+        elif kind == "login":
+            html = _page("Login", (
+                "<form method='post' action='/login'>"
+                "<input id='username' name='username'><input id='password' name='password' type='password'>"
+                "<button type='submit'>Sign in</button></form>"
+            ))
+        elif kind == "account":
+            if not self._logged_in():
+                return self._send(302, headers={"Location": "/login"})
+            html = _page(f"Account {number}", f"<div id='welcome'>Signed in</div><div id='list'>{_items('account', 0, ITEMS_PER_PAGE)}</div>")
+        else:
+            return self._send(404, b"not found")
+
+        self._send(200, html.encode("utf-8"))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if self.path.startswith("/login"):
+            return self._send(302, headers={
+                "Location": "/account/0",
+                "Set-Cookie": f"session={_SESSION}; Path=/; HttpOnly"
+            })
+        self._send(404, b"not found")
+
+
+class StubLaravel(BaseHTTPRequestHandler):
+    """Accepts result POSTs like LARAVEL_API_URL and records them with their arrival time."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    results = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        encoding = self.headers.get("Content-Encoding")
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "zstd" and zstandard is not None:
+            body = zstandard.ZstdDecompressor().decompress(body)
+
+        payload = json.loads(body)
+        received_at = time.monotonic()
+        with self.lock:
+            for result in payload["results"] if "results" in payload else [payload]:
+                self.results.append((received_at, result))
+
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def serve(handler, port=0):
+    """Start `handler` on 127.0.0.1 in a daemon thread; returns the base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=handler.__name__, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,258 @@
+"""
+Offline crawler benchmark.
+
+Starts the fixture site and a stub Laravel receiver on localhost, runs every
+scenario at every concurrency level through the real crawlers, sender and
+outbox, and prints a JSON report (pages/s, p50/p95 per-URL latency, peak RSS
+and peak browser count).
+
+Run from crawler-node/:
+
+    python -m bench.run --pages 20 --concurrency 1,4 --output bench.json
+    python -m bench.run --scenarios static_http,seed --baseline bench.json
+
+Per-URL latency is measured from the fixture site's first request for a URL
+to the arrival of its result at the stub receiver. Browser scenarios need
+Chromium installed locally (`playwright install chromium`).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+from bench.fixtures import FixtureSite, StubLaravel, serve
+
+SELECTORS = [
+    {"key": "title", "selector": ".item h2"},
+    {"key": "price", "selector": ".item .price"},
+]
+
+
+def _scenarios(site, pages):
+    """name -> (crawler type, job factory taking the concurrency level)."""
+    base_options = {"crawl_delay": 0, "selectors": SELECTORS}
+
+    def job(crawler_type, urls, **extra):
+        options = dict(base_options, **extra.pop("options", {}))
+        return lambda concurrency: {
+            "type": crawler_type,
+            "urls": urls,
+            "meta": {},
+            "options": dict(options, concurrency=concurrency),
+            **extra,
+        }
+
+    return {
+        "static": ("static", job("static", [f"{site}/static/{i}" for i in range(pages)])),
+        "static_http": ("static", job("static", [f"{site}/static/{i}" for i in range(pages)], options={"engine": "http"})),
+        "static_snapshot": ("static", job("static", [f"{site}/static/{i}" for i in range(pages)], options={"extraction": "snapshot"})),
+        "dynamic": ("dynamic", job("dynamic", [f"{site}/scroll/{i}?items=60" for i in range(pages)], options={"max_scrolls": 5})),
+        "paginated": ("paginated", job(
+            "paginated", [f"{site}/paged/0?pages={pages}&page=1"],
+            next_page_selector="a.next", options={"limit": pages}
+        )),
+        "paginated_parallel": ("paginated", job(
+            "paginated", [f"{site}/paged/0?pages={pages}&page=1"],
+            next_page_selector="a.next", options={"limit": pages, "pagination": "parallel"}
+        )),
+        "seed": ("seed", job("seed", [f"{site}/seed/{i}" for i in range(pages)])),
+        "seed_frontier": ("seed", job(
+            "seed", [f"{site}/seed/0"], options={"max_depth": 2, "max_pages": pages}
+        )),
+        "authenticated": ("authenticated", job(
+            "authenticated", [f"{site}/account/{i}" for i in range(pages)],
+            auth={
+                "login_url": f"{site}/login",
+                "login_selector": "#username",
+                "password_selector": "#password",
+                "logged_in_selector": "#welcome",
+                "credentials": {"username": "bench", "password": "bench"},
+                "reuse_session": False,
+            }
+        )),
+    }
+
+
+class _Sampler:
+    """Samples node RSS and live browsers in the background, keeping the peaks."""
+
+    def __init__(self, interval=0.05):
+        from services.browser_pool import browser_pool
+        from utils.metrics import node_rss
+
+        self._browser_pool = browser_pool
+        self._node_rss = node_rss
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_browsers = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bench-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_rss = max(self.peak_rss, self._node_rss())
+            self.peak_browsers = max(self.peak_browsers, self._browser_pool.live_browsers())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def _run_scenario(name, crawler_type, make_job, concurrency, site, timeout):
+    from services.runtime import runtime
+    from utils.helpers import get_crawler_by_type
+
+    run_id = f"{name}-c{concurrency}-{time.monotonic_ns()}"
+    job = make_job(concurrency)
+    job["meta"] = {"bench": run_id}
+
+    with FixtureSite.lock:
+        FixtureSite.first_seen.clear()
+
+    def mine():
+        with StubLaravel.lock:
+            return [(at, result) for at, result in StubLaravel.results if (result.get("meta") or {}).get("bench") == run_id]
+
+    with _Sampler() as sampler:
+        started_at = time.monotonic()
+        outcome = runtime.run(get_crawler_by_type(crawler_type).crawl(job))
+        # Crawlers report a failure that happened outside any page this way
+        failed = isinstance(outcome, dict) and outcome.get("status") == "error"
+        deadline = started_at + timeout
+        while not failed and not any(result.get("is_last") for _, result in mine()) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        elapsed = time.monotonic() - started_at
+
+    results = mine()
+    with FixtureSite.lock:
+        first_seen = dict(FixtureSite.first_seen)
+
+    latencies = []
+    for received_at, result in results:
+        url = result.get("original_url")
+        if isinstance(url, str) and url.startswith(site):
+            requested_at = first_seen.get(url[len(site):])
+            if requested_at is not None:
+                latencies.append(received_at - requested_at)
+
+    ok = [result for _, result in results if not result.get("error") and (result.get("status_code") or 200) < 400]
+    errors = [result.get("error") for _, result in results if result.get("error")]
+    report = {
+        "scenario": name,
+        "crawler": crawler_type,
+        "concurrency": concurrency,
+        "pages": len(ok),
+        "results": len(results),
+        "errors": len(errors),
+        "completed": any(result.get("is_last") for _, result in results),
+        "seconds": round(elapsed, 3),
+        "pages_per_s": round(len(ok) / elapsed, 2) if elapsed else None,
+        "p50_ms": round(1000 * _percentile(latencies, 0.5), 1) if latencies else None,
+        "p95_ms": round(1000 * _percentile(latencies, 0.95), 1) if latencies else None,
+        "peak_rss_mb": round(sampler.peak_rss / (1024 * 1024), 1),
+        "peak_browsers": sampler.peak_browsers,
+    }
+    if failed:
+        errors.append(outcome.get("message"))
+        report["errors"] = len(errors)
+    if errors:
+        report["first_error"] = str(errors[0])[:300]
+    return report
+
+
+def _print_summary(reports, baseline):
+    previous = {(r["scenario"], r["concurrency"]): r for r in (baseline or {}).get("results", [])}
+    print(f"{'scenario':<20}{'conc':>5}{'pages':>7}{'err':>5}{'pages/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'rss MB':>8}{'brws':>6}", file=sys.stderr)
+    for r in reports:
+        line = (
+            f"{r['scenario']:<20}{r['concurrency']:>5}{r['pages']:>7}{r['errors']:>5}"
+            f"{r['pages_per_s'] or 0:>9.2f}{r['p50_ms'] or 0:>9.1f}{r['p95_ms'] or 0:>9.1f}"
+            f"{r['peak_rss_mb']:>8.1f}{r['peak_browsers']:>6}"
+        )
+        before = previous.get((r["scenario"], r["concurrency"]))
+        if before and before.get("pages_per_s") and r["pages_per_s"]:
+            line += f"  {100 * (r['pages_per_s'] / before['pages_per_s'] - 1):+.1f}% pages/s"
+        print(line, file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline crawler benchmark")
+    parser.add_argument("--scenarios", default="all", help="comma separated, or 'all'")
+    parser.add_argument("--concurrency", default="1,4", help="comma separated concurrency levels")
+    parser.add_argument("--pages", type=int, default=20, help="pages per scenario")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for a scenario's is_last")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON report to compare pages/s against")
+    args = parser.parse_args(argv)
+
+    site = serve(FixtureSite)
+    receiver = serve(StubLaravel)
+
+    # The node reads its configuration at import time
+    workdir = tempfile.mkdtemp(prefix="crawler-bench-")
+    os.environ.update({
+        "LARAVEL_API_URL": f"{receiver}/results",
+        "LARAVEL_API_TOKEN": "bench",
+        "OUTBOX_PATH": os.path.join(workdir, "outbox.sqlite3"),
+        "PAGE_CACHE_PATH": os.path.join(workdir, "page_cache.sqlite3"),
+        "SESSION_STORE_DIR": os.path.join(workdir, "sessions"),
+        "SENDER_LINGER_MS": "0",
+        "HOST_RATE": "0",
+        "ROBOTS_CRAWL_DELAY": "false",
+    })
+    from utils.sender import result_sender
+    result_sender.start()
+
+    scenarios = _scenarios(site, args.pages)
+    names = list(scenarios) if args.scenarios == "all" else [name.strip() for name in args.scenarios.split(",")]
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    reports = []
+    for name in names:
+        if name not in scenarios:
+            parser.error(f"unknown scenario {name!r}, expected one of {', '.join(scenarios)}")
+        crawler_type, make_job = scenarios[name]
+        for concurrency in levels:
+            try:
+                reports.append(_run_scenario(name, crawler_type, make_job, concurrency, site, args.timeout))
+            except Exception as e:
+                reports.append({"scenario": name, "crawler": crawler_type, "concurrency": concurrency, "error": str(e)})
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    _print_summary([r for r in reports if "pages" in r], baseline)
+
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "pages": args.pages,
+        "results": reports,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,3 +6,103 @@ load_dotenv(".env")  # Load your crawler-specific env
 LARAVEL_API_URL = os.getenv("LARAVEL_API_URL")
 LARAVEL_API_TOKEN = os.getenv("LARAVEL_API_TOKEN")
 DEBUG_MODE = os.getenv("DEBUG_MODE")
+
+# Browser pool
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_CONTEXTS = int(os.getenv("BROWSER_MAX_CONTEXTS", "100"))
+BROWSER_MAX_RSS_MB = int(os.getenv("BROWSER_MAX_RSS_MB", "2048"))  # per browser process tree
+BROWSER_MAX_DRAINING = int(os.getenv("BROWSER_MAX_DRAINING", "1"))  # recycled browsers still finishing contexts
+
+# Job scheduler
+WORKER_SLOTS = int(os.getenv("WORKER_SLOTS", "4"))
+QUEUE_MAX_SIZE = int(os.getenv("QUEUE_MAX_SIZE", "50"))
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "30"))
+
+# Per-job page concurrency
+MAX_JOB_CONCURRENCY = int(os.getenv("MAX_JOB_CONCURRENCY", "8"))
+PER_HOST_CONCURRENCY = int(os.getenv("PER_HOST_CONCURRENCY", "2"))
+
+# HTTP fetch engine
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+
+# Result delivery
+SENDER_POOL_SIZE = int(os.getenv("SENDER_POOL_SIZE", "10"))  # delivery threads, one connection each
+SENDER_TIMEOUT = float(os.getenv("SENDER_TIMEOUT", "20"))
+SENDER_BATCH_MAX = int(os.getenv("SENDER_BATCH_MAX", "1"))  # >1 posts {"results": [...]}
+SENDER_BATCH_MAX_BYTES = int(os.getenv("SENDER_BATCH_MAX_BYTES", str(1024 * 1024)))
+SENDER_LINGER_MS = int(os.getenv("SENDER_LINGER_MS", "50"))
+
+# Durable outbox for undelivered results
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "data/outbox.sqlite3")
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "0"))  # 0 = no limit
+OUTBOX_MAX_AGE = int(os.getenv("OUTBOX_MAX_AGE", str(24 * 3600)))  # seconds before a failing result is buried, 0 = no limit
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "1"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "300"))
+
+# Request interception (profile name or comma separated resource types)
+DEFAULT_BLOCK_PROFILE = os.getenv("DEFAULT_BLOCK_PROFILE", "none")
+
+# Page readiness
+DEFAULT_WAIT_UNTIL = os.getenv("DEFAULT_WAIT_UNTIL", "networkidle")
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "15"))
+DOM_QUIET_MS = int(os.getenv("DOM_QUIET_MS", "500"))
+
+# Infinite scroll
+SCROLL_STEP_TIMEOUT = float(os.getenv("SCROLL_STEP_TIMEOUT", "6"))
+SCROLL_IDLE_ROUNDS = int(os.getenv("SCROLL_IDLE_ROUNDS", "2"))
+SCROLL_BUDGET = float(os.getenv("SCROLL_BUDGET", "60"))
+
+# Login session cache (disabled unless SESSION_STORE_KEY is set)
+SESSION_STORE_DIR = os.getenv("SESSION_STORE_DIR", "data/sessions")
+SESSION_STORE_KEY = os.getenv("SESSION_STORE_KEY")
+SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", str(12 * 3600)))
+
+# Page cache for revalidation / unchanged-result skipping
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", "data/page_cache.sqlite3")
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", str(7 * 24 * 3600)))
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "100000"))
+
+# Node identity and readiness
+NODE_ID = os.getenv("NODE_ID", "node-1")
+MEMORY_LIMIT_MB = int(os.getenv("MEMORY_LIMIT_MB", "0"))  # 0 = cgroup limit or host memory
+READY_MIN_HEADROOM_MB = int(os.getenv("READY_MIN_HEADROOM_MB", "512"))
+READY_QUEUE_ALLOWANCE = int(os.getenv("READY_QUEUE_ALLOWANCE", "0"))
+ERROR_RATE_WINDOW = int(os.getenv("ERROR_RATE_WINDOW", "300"))
+METRICS_MAX_HOSTS = int(os.getenv("METRICS_MAX_HOSTS", "200"))  # hosts with their own metric series, the rest are "other"
+
+# Result payload encoding
+SENDER_COMPRESSION = os.getenv("SENDER_COMPRESSION", "none")  # none | gzip | zstd
+SENDER_COMPRESS_MIN_BYTES = int(os.getenv("SENDER_COMPRESS_MIN_BYTES", "1024"))
+SENDER_MAX_BODY_BYTES = int(os.getenv("SENDER_MAX_BODY_BYTES", str(8 * 1024 * 1024)))
+
+# Serving and shutdown
+WEB_THREADS = int(os.getenv("WEB_THREADS", "16"))
+SHUTDOWN_GRACE = int(os.getenv("SHUTDOWN_GRACE", "30"))  # seconds running jobs get to finish
+SHUTDOWN_FLUSH_TIMEOUT = int(os.getenv("SHUTDOWN_FLUSH_TIMEOUT", "10"))
+
+# Node-wide per-host rate limiting
+HOST_RATE = float(os.getenv("HOST_RATE", "2"))  # requests per second per host, 0 = unlimited
+HOST_BURST = int(os.getenv("HOST_BURST", "2"))
+HOST_MAX_CONCURRENCY = int(os.getenv("HOST_MAX_CONCURRENCY", "4"))  # pages navigating per host
+HOST_SLOW_SECONDS = float(os.getenv("HOST_SLOW_SECONDS", "10"))
+HOST_BACKOFF_MAX = float(os.getenv("HOST_BACKOFF_MAX", "60"))  # longest interval between requests
+MAX_TRACKED_HOSTS = int(os.getenv("MAX_TRACKED_HOSTS", "10000"))
+ROBOTS_CRAWL_DELAY = os.getenv("ROBOTS_CRAWL_DELAY", "true").lower() == "true"
+ROBOTS_CACHE_TTL = int(os.getenv("ROBOTS_CACHE_TTL", str(24 * 3600)))
+
+# Extraction
+DEFAULT_EXTRACTION = os.getenv("DEFAULT_EXTRACTION", "page")  # page | snapshot
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "0"))  # 0 = one per CPU
+
+# Job deadlines and tracking
+DEFAULT_DEADLINE_S = float(os.getenv("DEFAULT_DEADLINE_S", "0"))  # 0 = no deadline
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "1000"))  # finished jobs kept for GET /crawl/<job_id>
+
+# Pull mode: nodes lease jobs from a shared broker instead of running what is POSTed to them
+QUEUE_MODE = os.getenv("QUEUE_MODE", "push")  # push | pull
+BROKER_URL = os.getenv("BROKER_URL", "sqlite:///data/broker.sqlite3")  # or redis://host:6379/0
+BROKER_QUEUE = os.getenv("BROKER_QUEUE", "crawl-jobs")
+BROKER_VISIBILITY_TIMEOUT = int(os.getenv("BROKER_VISIBILITY_TIMEOUT", "120"))
+BROKER_POLL_INTERVAL = float(os.getenv("BROKER_POLL_INTERVAL", "1"))
+BROKER_MAX_DELIVERIES = int(os.getenv("BROKER_MAX_DELIVERIES", "3"))
@@ -0,0 +1,28 @@
+# Production server: gunicorn -c gunicorn.conf.py main:app
+#
+# One process on purpose: the scheduler, browser pool and result outbox are
+# per-process, so extra processes would each launch their own browsers and
+# race on the outbox. Request intake is served by WEB_THREADS threads, apart
+# from the runtime loop thread that runs the crawl jobs.
+import os
+
+from config import WEB_THREADS, SHUTDOWN_GRACE, SHUTDOWN_FLUSH_TIMEOUT
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = 1
+worker_class = "gthread"
+threads = WEB_THREADS
+timeout = 60
+# Room for running jobs to finish and the outbox to flush before SIGKILL
+graceful_timeout = SHUTDOWN_GRACE + SHUTDOWN_FLUSH_TIMEOUT + 5
+accesslog = None
+
+
+def post_worker_init(worker):
+    from services.lifecycle import start_node
+    start_node()
+
+
+def worker_exit(server, worker):
+    from services.lifecycle import shutdown_node
+    shutdown_node()
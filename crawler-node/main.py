@@ -1,6 +1,8 @@
 from flask import Flask
 from routes.health import health_bp
 from routes.crawl import crawl_bp
+from routes.metrics import metrics_bp
+from services.lifecycle import start_node, shutdown_node
 import sys
 import io
 
@@ -10,6 +12,14 @@ app = Flask(__name__)
 
 app.register_blueprint(health_bp)
 app.register_blueprint(crawl_bp)
+app.register_blueprint(metrics_bp)
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
+    # Development server; production runs gunicorn -c gunicorn.conf.py main:app.
+    # Both start the background services explicitly rather than at import,
+    # since extraction pool processes (spawned) re-import this module.
+    start_node()
+    try:
+        app.run(host="0.0.0.0", port=5000)
+    finally:
+        shutdown_node()
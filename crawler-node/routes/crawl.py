@@ -1,11 +1,29 @@
-import threading
 from flask import Blueprint, request, jsonify
 from utils.helpers import get_crawler_by_type
-from config import LARAVEL_API_TOKEN
+from config import LARAVEL_API_TOKEN, QUEUE_MODE
 from utils.sender import send_result_to_laravel
+from services.scheduler import scheduler, QueueFull, ShuttingDown
+from services.puller import job_puller
+from services.broker import DuplicateJob
+from utils.metrics import JOBS
 
 crawl_bp = Blueprint('crawl', __name__)
 
+
+def _with_queue_headers(response):
+    # Lets the dispatcher see back-pressure without an extra request
+    stats = scheduler.stats()
+    response.headers['X-Queue-Depth'] = str(stats["queued"])
+    response.headers['X-Running-Jobs'] = str(stats["running"])
+    response.headers['X-Queue-Wait'] = str(stats["avg_wait_s"])
+    return response
+
+
+def _authorized():
+    auth_header = request.headers.get("Authorization", "")
+    return auth_header.replace("Bearer ", "").strip() == LARAVEL_API_TOKEN
+
+
 @crawl_bp.route('/crawl', methods=['POST'])
 def crawl():
     try:
@@ -13,11 +31,12 @@ def crawl():
         crawler_type = data.get("type")
         url = data.get("urls")
         meta = data.get('meta')
+        crawler = get_crawler_by_type(crawler_type)
+        # Only known types become metric labels, whatever the request says
+        type_label = crawler_type if crawler else "unknown"
 
-        auth_header = request.headers.get("Authorization", "")
-        token = auth_header.replace("Bearer ", "").strip()
-
-        if token != LARAVEL_API_TOKEN:
+        if not _authorized():
+            JOBS.labels(type_label, "unauthorized").inc()
             send_result_to_laravel({
                 "type": crawler_type,
                 "original_url": url,
@@ -30,6 +49,7 @@ def crawl():
             return jsonify({'error': 'Unauthorized'}), 401
 
         if not crawler_type or not url:
+            JOBS.labels(type_label, "invalid").inc()
             send_result_to_laravel({
                 "type": crawler_type,
                 "original_url": url,
@@ -41,8 +61,8 @@ def crawl():
             })
             return jsonify({'error': 'Missing data'}), 400
 
-        crawler = get_crawler_by_type(crawler_type)
         if not crawler:
+            JOBS.labels("unknown", "invalid").inc()
             send_result_to_laravel({
                 "type": crawler_type,
                 "original_url": url,
@@ -54,9 +74,49 @@ def crawl():
             })
             return jsonify({'error': 'Unknown crawler type'}), 400
 
-        threading.Thread(target=crawler.crawl, args=(data,)).start()
+        if QUEUE_MODE == "pull":
+            # Any node takes the job from the shared broker once it has a free slot
+            try:
+                job_id = job_puller.broker.push(data)
+            except DuplicateJob:
+                # Not reported to Laravel: the result would carry the queued job's ID
+                JOBS.labels(crawler_type, "rejected").inc()
+                return jsonify({'error': 'Duplicate job_id', 'job_id': data.get("job_id")}), 409
+            JOBS.labels(crawler_type, "brokered").inc()
+            return jsonify({'status': 'queued', 'job_id': job_id}), 202
 
-        return jsonify({'status': 'ok'}), 200
+        try:
+            job_id = scheduler.submit(crawler, data)
+        except QueueFull:
+            JOBS.labels(crawler_type, "rejected").inc()
+            retry_after = scheduler.retry_after()
+            send_result_to_laravel({
+                "type": crawler_type,
+                "original_url": url,
+                "final_url": '',
+                "error": 'Crawler node is busy, retry later',
+                "meta": meta,
+                "is_last": True,
+                'status_code': 429
+            })
+            response = jsonify({'error': 'Queue full', 'queue': scheduler.stats()})
+            response.headers['Retry-After'] = str(retry_after)
+            return _with_queue_headers(response), 429
+        except ShuttingDown:
+            JOBS.labels(crawler_type, "rejected").inc()
+            send_result_to_laravel({
+                "type": crawler_type,
+                "original_url": url,
+                "final_url": '',
+                "error": 'Crawler node shutting down, retry on another node',
+                "meta": meta,
+                "is_last": True,
+                'status_code': 503
+            })
+            return jsonify({'error': 'Shutting down'}), 503
+
+        JOBS.labels(crawler_type, "accepted").inc()
+        return _with_queue_headers(jsonify({'status': 'ok', 'job_id': job_id, 'queue': scheduler.stats()})), 200
 
     except Exception as e:
         send_result_to_laravel({
@@ -69,3 +129,25 @@ def crawl():
             'status_code': 500
         })
         return jsonify({'error': 'Internal server error'}), 500
+
+
+@crawl_bp.route('/crawl/<job_id>', methods=['GET'])
+def job_status(job_id):
+    if not _authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    # In pull mode the job may still be waiting in the broker or run on another node
+    job = job_puller.get(job_id) if QUEUE_MODE == "pull" else scheduler.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job), 200
+
+
+@crawl_bp.route('/crawl/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    # Stops the job, closes its browser context and sends its final is_last result
+    if not _authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    job = job_puller.cancel(job_id) if QUEUE_MODE == "pull" else scheduler.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job), 200
@@ -1,12 +1,52 @@
 from flask import Blueprint, jsonify
 import datetime
+from services.scheduler import scheduler
+from services.browser_pool import browser_pool
+from utils.sender import result_sender
+from utils.metrics import node_rss, memory_limit, recent_results
+from config import NODE_ID, READY_MIN_HEADROOM_MB, READY_QUEUE_ALLOWANCE
 
 health_bp = Blueprint('health', __name__)
 
+
+def _node_status():
+    queue = scheduler.stats()
+    headroom_mb = (memory_limit() - node_rss()) // (1024 * 1024)
+
+    reasons = []
+    if scheduler.closing:
+        reasons.append("shutting down")
+    if queue["free_slots"] == 0 and queue["queued"] >= READY_QUEUE_ALLOWANCE:
+        reasons.append("no free worker slots")
+    if queue["queued"] >= queue["max_queue"]:
+        reasons.append("queue full")
+    if headroom_mb < READY_MIN_HEADROOM_MB:
+        reasons.append("low memory")
+
+    return {
+        "node": NODE_ID,
+        "ready": not reasons,
+        "reasons": reasons,
+        "running_jobs": queue["running"],
+        "queued_jobs": queue["queued"],
+        "free_slots": queue["free_slots"],
+        "live_browsers": browser_pool.live_browsers(),
+        "memory_headroom_mb": headroom_mb,
+        "error_rate": round(recent_results.error_rate(), 4),
+        "queue": queue,
+        "sender": result_sender.stats(),
+        "time": datetime.datetime.utcnow().isoformat() + "Z"
+    }
+
+
 @health_bp.route('/health')
 def health():
-    return jsonify({
-        "status": "ok",
-        "node": "node-1",
-        "time": datetime.datetime.utcnow().isoformat() + "Z"
-    })
+    # Liveness: always 200 while the process serves requests
+    return jsonify({"status": "ok", **_node_status()})
+
+
+@health_bp.route('/ready')
+def ready():
+    # Readiness: 503 while the node cannot take more work, so balancers skip it
+    status = _node_status()
+    return jsonify({"status": "ready" if status["ready"] else "busy", **status}), 200 if status["ready"] else 503
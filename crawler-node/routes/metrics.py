@@ -0,0 +1,18 @@
+from flask import Blueprint, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from services.browser_pool import browser_pool
+from services.scheduler import scheduler
+from utils.sender import result_sender
+from utils.metrics import ACTIVE_BROWSERS, ACTIVE_PAGES, QUEUED_JOBS, RUNNING_JOBS, OUTBOX_PENDING
+
+metrics_bp = Blueprint('metrics', __name__)
+
+ACTIVE_BROWSERS.set_function(browser_pool.live_browsers)
+ACTIVE_PAGES.set_function(browser_pool.live_pages)
+QUEUED_JOBS.set_function(lambda: scheduler.stats()["queued"])
+RUNNING_JOBS.set_function(lambda: scheduler.stats()["running"])
+OUTBOX_PENDING.set_function(lambda: result_sender.outbox.counts()[0])
+
+@metrics_bp.route('/metrics')
+def metrics():
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
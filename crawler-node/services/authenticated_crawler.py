@@ -1,16 +1,22 @@
 
 import asyncio
-from playwright.async_api import async_playwright
 from services.base_crawler import BaseCrawler
-from utils.sender import send_result_to_laravel
-from config import DEBUG_MODE
+from services.readiness import HostPoliteness
+from services.session_store import session_store
 
 
 class AuthenticatedCrawler(BaseCrawler):
-    def crawl(self, config):
-        return asyncio.run(self._crawl_authenticated(config))
+    crawler_type = "authenticated"
 
-    async def _crawl_authenticated(self, config):
+    def __init__(self):
+        super().__init__()
+        self.account = None  # (login_url, username) of the job
+
+    def cache_spec(self, options):
+        # Pages differ per account: never serve or compare another login's content
+        return {**super().cache_spec(options), "account": self.account}
+
+    async def crawl(self, config):
         try:
             urls = config.get("urls")
             if not urls or not isinstance(urls, list):
@@ -22,7 +28,7 @@ class AuthenticatedCrawler(BaseCrawler):
                     "is_last": True,
                     'status_code' : 400
                 }
-                send_result_to_laravel(result)
+                await self.send(result)
                 return '', 400
                 
             auth = config.get("auth", {})
@@ -40,11 +46,13 @@ class AuthenticatedCrawler(BaseCrawler):
                     "is_last": True,
                     'status_code' : 400
                 }
-                send_result_to_laravel(result)
+                await self.send(result)
                 return '', 400
 
+            self.account = (login_url, username)
             options = config.get("options", {})
             delay = int(options.get("crawl_delay", 1))
+            self.politeness = HostPoliteness(delay)
             headers = options.get("headers", {})
             selectors = options.get("selectors", [])
             
@@ -56,96 +64,86 @@ class AuthenticatedCrawler(BaseCrawler):
                     "Chrome/119.0.0.0 Safari/537.36"
                 )
 
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
-                    headless=not DEBUG_MODE,
-                    slow_mo=200 if DEBUG_MODE else 0
-                )
-                context = await browser.new_context(extra_http_headers=headers)
+            async def handle(page, url):
+                await self.goto(page, url, options, selectors, timeout=30000)
+
+                extracted_data = await self.extract_deferred(page, selectors, options)
+
+                return {
+                    "type": "authenticated",
+                    "original_url": url,
+                    "final_url": page.url,
+                    "content": extracted_data,
+                    "meta": config.get("meta", {}),
+                    'status_code': 200
+                }
+
+            meta = config.get("meta", {})
+            reuse_session = auth.get("reuse_session", True)
+
+            # Reuse a cached login when it is still valid
+            storage_state = session_store.load(login_url, username) if reuse_session else None
+            if storage_state is not None:
+                async with self.new_context(headers, options, storage_state=storage_state) as context:
+                    if await self._session_is_valid(context, auth, options, urls[0]):
+                        await self.crawl_pages(context, urls, handle, meta, options)
+                        # Keep refreshed cookies for the next job
+                        session_store.save(login_url, username, await context.storage_state())
+                        return
+                session_store.drop(login_url, username)
+
+            async with self.new_context(headers, options) as context:
                 page = await context.new_page()
 
                 try:
                     # Go to login page and perform login
-                    await page.goto(login_url, timeout=30000)
-                    await page.wait_for_load_state("networkidle")
+                    await self.goto(page, login_url, options, [login_selector], timeout=30000)
                     await page.fill(login_selector, username)
                     await page.fill(password_selector, password)
                     await asyncio.gather(page.press(password_selector, "Enter"))
                     await asyncio.sleep(delay)
-
-                    # Crawl target pages after login
-                    for index, url in enumerate(urls):
-                        try:
-                            await page.goto(url, timeout=30000)
-                            await page.wait_for_load_state("networkidle")
-                            await asyncio.sleep(delay)
-
-                            extracted_data = {}
-                            for selector_item in selectors:
-                                field = selector_item.get("key")
-                                selector = selector_item.get("selector")
-                                full_html = selector_item.get("full_html", False)
-
-                                if not field or not selector:
-                                    continue
-
-                                try:
-                                    elements = await page.query_selector_all(selector)
-                                    field_contents = []
-                                    
-                                    for element in elements:
-                                        try:
-                                                if full_html:
-                                                    content = await element.inner_html()
-                                                else:
-                                                    raw_text = await element.text_content()
-                                                    content = ' '.join([
-                                                        t.strip() for t in raw_text.split('\n')
-                                                        if t.strip() and t not in ('== %0', '⇔')
-                                                    ]) if raw_text else None
-                                                if content:
-                                                    field_contents.append(content.strip())
-                                        except Exception:
-                                            continue
-
-                                        extracted_data[field] = field_contents  # this will be a list of values
-                                except Exception:
-                                        extracted_data[field] = []
-                                    
-                            result = {
-                                "type": "authenticated",
-                                "original_url": url,
-                                "final_url": page.url,
-                                "content": extracted_data,
-                                "meta": config.get("meta", {}),
-                                "is_last": index == len(urls) - 1,
-                                'status_code': 200
-                            }
-                            
-                            send_result_to_laravel(result)
-                        except Exception as page_error:
-                            error_result = {
-                                "type": "authenticated",
-                                "original_url": url,
-                                "error": str(page_error),
-                                "meta": config.get("meta", {}),
-                                "is_last": index == len(urls) - 1,
-                                'status_code': 500
-                            }
-                            send_result_to_laravel(error_result)
-                            
+                    logged_in_selector = auth.get("logged_in_selector")
+                    if logged_in_selector:
+                        await page.wait_for_selector(logged_in_selector, timeout=30000)
+                    await page.close()
                 except Exception as page_error:
                     error_result = {
                         "type": "authenticated",
-                        "original_url": url,
+                        "original_url": urls,
                         "error": str(page_error),
-                        "meta": config.get("meta", {}),
-                        "is_last": index == len(urls) - 1,
+                        "meta": meta,
+                        "is_last": True,
                         'status_code': 500
                         }
-                    send_result_to_laravel(error_result)             
+                    await self.send(error_result)
+                    return
 
-                await browser.close()
+                if reuse_session:
+                    session_store.save(login_url, username, await context.storage_state())
+
+                # Crawl target pages after login, the session is shared by the context
+                await self.crawl_pages(context, urls, handle, meta, options)
 
         except Exception as e:
             return {"status": "error", "message": str(e)}
+
+    async def _session_is_valid(self, context, auth, options, default_check_url):
+        """
+        Open `auth.check_url` (the first target url by default) with a cached
+        session. It is valid when `auth.logged_in_selector` shows up or, without
+        one, when we were not sent back to the login form.
+        """
+        check_url = auth.get("check_url") or default_check_url
+        logged_in_selector = auth.get("logged_in_selector")
+        page = await context.new_page()
+        try:
+            await self.goto(page, check_url, options, [logged_in_selector] if logged_in_selector else None, timeout=30000)
+            if logged_in_selector:
+                return await page.query_selector(logged_in_selector) is not None
+            if page.url.split("#")[0].rstrip("/") == auth.get("login_url", "").split("#")[0].rstrip("/"):
+                return False
+            return await page.query_selector(auth.get("password_selector")) is None
+        except Exception:
+            return False
+        finally:
+            await page.close()
@@ -1,6 +1,270 @@
+import asyncio
 from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+from services.browser_pool import browser_pool
+from services.host_limiter import host_limiter
+from services.interception import apply_block_profile
+from services.readiness import HostPoliteness, goto_wait_until, wait_until_ready
+from services import http_fetcher
+from utils.extraction import extract_from_page, extract_from_html, extract_in_pool
+from utils.metrics import phase_timer, record_error
+from utils.page_cache import page_cache, cache_key, conditional_headers
+from utils.sender import send_result_to_laravel
+from config import MAX_JOB_CONCURRENCY, PER_HOST_CONCURRENCY, DEFAULT_EXTRACTION
+
 
 class BaseCrawler(ABC):
+    crawler_type = None
+
+    def __init__(self):
+        self.politeness = HostPoliteness(0)
+        self.validators = {}  # url -> (ETag, Last-Modified) of its last fetch
+        self.prefetched = {}  # url -> full response to a revalidation, used by the next fetch
+        self.job_id = None    # set by the scheduler
+        self.results_sent = 0
+        self.sent_last = False
+
     @abstractmethod
-    def crawl(self, url, options=None):
-        pass
+    async def crawl(self, config):
+        """Run one job on the node runtime's loop; results go out through `send()`."""
+
+    @asynccontextmanager
+    async def new_context(self, headers=None, options=None, storage_state=None):
+        """Pooled browser context with the job's headers and block profile applied."""
+        async with browser_pool.context(extra_http_headers=headers or {}, storage_state=storage_state) as context:
+            await apply_block_profile(context, (options or {}).get("block"))
+            yield context
+
+    async def goto(self, page, url, options, wait_for=None, timeout=15000):
+        """
+        Navigate once the politeness delay for the url's host has passed and
+        the node-wide host limiter grants a slot, then wait for the page to be
+        ready according to the job's readiness options.
+        """
+        await self.politeness.wait(url)
+        async with host_limiter.slot(url) as permit:
+            with phase_timer(self.crawler_type, url, "goto"):
+                response = await page.goto(url, timeout=timeout, wait_until=goto_wait_until(options))
+            if response is not None:
+                permit.observe(response.status, response.headers.get("retry-after"))
+                self.remember_validators(url, response.headers)
+            else:
+                permit.observe(200)  # same-document navigation, nothing was fetched
+            with phase_timer(self.crawler_type, url, "ready"):
+                await wait_until_ready(page, options, wait_for)
+        return response
+
+    async def fetch(self, url, headers=None):
+        """Plain HTTP GET through the shared client, under the same per-host limits as `goto`."""
+        response = self.prefetched.pop(url, None)
+        if response is not None:
+            return response
+        await self.politeness.wait(url)
+        async with host_limiter.slot(url) as permit:
+            with phase_timer(self.crawler_type, url, "http_fetch"):
+                response = await http_fetcher.fetch(url, headers=headers)
+            permit.observe(response.status_code, response.headers.get("retry-after"))
+        return response
+
+    async def extract(self, page, selectors, options=None):
+        """
+        Evaluate `selectors` on the page. With `options.extraction` "snapshot"
+        the page HTML is captured once and parsed in the extraction process
+        pool instead of inside the browser.
+        """
+        content = await self.extract_deferred(page, selectors, options)
+        if isinstance(content, asyncio.Future):
+            content = await content
+        return content
+
+    async def extract_deferred(self, page, selectors, options=None):
+        """
+        Like `extract`, but in snapshot mode returns as soon as the HTML is
+        captured, with a future for the content. `crawl_pages` releases the
+        page for the next url before resolving it.
+        """
+        if (options or {}).get("extraction", DEFAULT_EXTRACTION) != "snapshot":
+            with phase_timer(self.crawler_type, page.url, "extract"):
+                return await extract_from_page(page, selectors)
+
+        url = page.url
+        with phase_timer(self.crawler_type, url, "snapshot"):
+            html = await page.content()
+        return asyncio.ensure_future(self.parse_html(url, html, selectors, options))
+
+    async def parse_html(self, url, html, selectors, options=None):
+        """`extract_from_html`, in the extraction process pool in snapshot mode."""
+        with phase_timer(self.crawler_type, url, "extract"):
+            if (options or {}).get("extraction", DEFAULT_EXTRACTION) == "snapshot":
+                return await extract_in_pool(html, selectors)
+            return extract_from_html(html, selectors)
+
+    def cache_spec(self, options):
+        """What the content of a result depends on besides its url, for `cache_key`."""
+        return {"selectors": options.get("selectors", [])}
+
+    def remember_validators(self, url, headers):
+        self.validators[url] = (headers.get("etag"), headers.get("last-modified"))
+
+    async def revalidate(self, page, url, meta, options):
+        """
+        Ask the server whether `url` changed since it was cached, with a
+        conditional GET. Returns the cached result payload on 304, else None.
+        Without a page, a changed page's response is kept for the handler's
+        `fetch` instead of downloading it again.
+        """
+        key = cache_key(self.crawler_type, url, self.cache_spec(options))
+        entry = page_cache.get(key)
+        headers = conditional_headers(entry)
+        if not headers:
+            return None
+
+        try:
+            if page is not None:
+                await self.politeness.wait(url)
+                async with host_limiter.slot(url) as permit:
+                    response = await page.context.request.get(url, headers=headers)
+                    status = response.status
+                    permit.observe(status, response.headers.get("retry-after"))
+                    await response.dispose()
+            else:
+                response = await self.fetch(url, headers={**options.get("headers", {}), **headers})
+                status = response.status_code
+                if status == 200:
+                    self.prefetched[url] = response
+        except Exception:
+            return None
+
+        if status != 304:
+            return None
+        page_cache.put(key, entry["final_url"], entry["content"], entry["etag"], entry["last_modified"])
+        return {
+            "type": self.crawler_type,
+            "original_url": url,
+            "final_url": entry["final_url"],
+            "content": entry["content"],
+            "meta": meta,
+            "status_code": 200
+        }
+
+    async def send(self, payload):
+        # Only queues the result, delivery happens on the sender threads.
+        # Encoding and the outbox write run in a thread, off the shared loop
+        if self.job_id is not None:
+            payload.setdefault("job_id", self.job_id)
+        self.results_sent += 1
+        self.sent_last = self.sent_last or bool(payload.get("is_last"))
+        return await asyncio.to_thread(send_result_to_laravel, payload)
+
+    def _page_error(self, url, meta, error):
+        record_error(self.crawler_type, error)
+        return {
+            "type": self.crawler_type,
+            "original_url": url,
+            "error": str(error),
+            "meta": meta,
+            "status_code": 500
+        }
+
+    async def _discard_page(self, page):
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def crawl_pages(self, context, urls, handler, meta, options):
+        """
+        Run `handler(page, url)` for every url, each on its own page of `context`
+        (`page` is None when no context is given, e.g. for plain HTTP fetches).
+
+        At most `options.concurrency` pages are open at once and at most
+        `options.per_host_concurrency` of them hit the same host. The handler
+        returns the result payload; a failing handler produces the usual error
+        payload. `is_last` is set on whichever result completes last.
+
+        With `options.cache` ("revalidate") a conditional request is made first
+        and a 304 reuses the cached content without running the handler. With
+        `options.skip_unchanged`, results whose content hash matches the cached
+        one are not sent; if that result was due to carry is_last, a bare
+        `unchanged` marker is sent in its place.
+
+        A handler may return its `content` as a future (`extract_deferred`);
+        it is resolved after the page went back to the pool. Pages that
+        crashed or were closed are not reused.
+        """
+        concurrency = max(1, min(int(options.get("concurrency", 1)), MAX_JOB_CONCURRENCY))
+        per_host = max(1, int(options.get("per_host_concurrency", PER_HOST_CONCURRENCY)))
+
+        slots = asyncio.Semaphore(concurrency)
+        host_slots = defaultdict(lambda: asyncio.Semaphore(per_host))
+        idle_pages = []
+        crashed_pages = set()
+        send_lock = asyncio.Lock()
+        remaining = len(urls)
+        revalidate = options.get("cache") in (True, "revalidate")
+        skip_unchanged = bool(options.get("skip_unchanged"))
+        use_cache = revalidate or skip_unchanged
+
+        async def fetch(url):
+            nonlocal remaining
+            async with host_slots[urlparse(url).netloc]:
+                async with slots:
+                    page = idle_pages.pop() if idle_pages else None
+                    unchanged = False
+                    handled = False
+                    try:
+                        if page is None and context is not None:
+                            page = await context.new_page()
+                            page.on("crash", crashed_pages.add)
+                        payload = await self.revalidate(page, url, meta, options) if revalidate else None
+                        if payload is not None:
+                            unchanged = True
+                        else:
+                            payload = await handler(page, url)
+                            handled = True
+                    except Exception as page_error:
+                        payload = self._page_error(url, meta, page_error)
+                    finally:
+                        if page is not None:
+                            if page.is_closed() or page in crashed_pages:
+                                # The next url opens a fresh page instead
+                                await self._discard_page(page)
+                            else:
+                                idle_pages.append(page)
+
+            # The page and slots are free again: a snapshot extraction
+            # (extract_deferred) finishes here while the next url loads
+            try:
+                if isinstance(payload.get("content"), asyncio.Future):
+                    payload["content"] = await payload["content"]
+                if handled and use_cache and "content" in payload:
+                    etag, last_modified = self.validators.pop(url, (None, None))
+                    unchanged = page_cache.put(
+                        cache_key(self.crawler_type, url, self.cache_spec(options)), payload.get("final_url"),
+                        payload["content"], etag, last_modified
+                    )
+            except Exception as page_error:
+                payload = self._page_error(url, meta, page_error)
+
+            # Sends are serialised so the is_last result is always delivered last
+            async with send_lock:
+                remaining -= 1
+                is_last = remaining == 0
+                if skip_unchanged and unchanged:
+                    if not is_last:
+                        return
+                    payload = {
+                        "type": self.crawler_type,
+                        "original_url": url,
+                        "final_url": payload.get("final_url"),
+                        "unchanged": True,
+                        "meta": meta,
+                        "status_code": 304
+                    }
+                payload["is_last"] = is_last
+                await self.send(payload)
+
+        await asyncio.gather(*(fetch(url) for url in urls))
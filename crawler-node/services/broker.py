@@ -0,0 +1,316 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+from config import BROKER_URL, BROKER_QUEUE
+
+
+class DuplicateJob(Exception):
+    pass
+
+
+def _info(job_id, leased, deliveries, owner, cancelled):
+    return {
+        "job_id": job_id,
+        "status": "leased" if leased else "queued",
+        "deliveries": deliveries,
+        "node": owner if leased else None,
+        "cancel_requested": bool(cancelled),
+    }
+
+
+class SQLiteBroker:
+    """
+    Job queue in a SQLite file, shared by every node that can open it (or
+    in-process with ":memory:", for tests).
+
+    `lease()` hides jobs for `visibility` seconds; a job that is neither
+    acked nor extended in that time becomes visible again and is redelivered.
+    `cancel()` deletes a waiting job, and flags a leased one so its node can
+    stop it (see `cancelled()`).
+    """
+
+    def __init__(self, path):
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " id TEXT UNIQUE NOT NULL,"
+            " body TEXT NOT NULL,"
+            " visible_at REAL NOT NULL,"
+            " deliveries INTEGER NOT NULL DEFAULT 0,"
+            " owner TEXT,"
+            " cancelled INTEGER NOT NULL DEFAULT 0)"
+        )
+        if "cancelled" not in [column[1] for column in self._db.execute("PRAGMA table_info(jobs)")]:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN cancelled INTEGER NOT NULL DEFAULT 0")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_visible_at ON jobs (visible_at, seq)")
+
+    def push(self, data):
+        """Queue a job; returns its ID. Raises DuplicateJob when its job_id is already queued."""
+        job_id = data.get("job_id") or uuid.uuid4().hex
+        body = json.dumps({**data, "job_id": job_id})
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT INTO jobs (id, body, visible_at) VALUES (?, ?, ?)", (job_id, body, time.time())
+                )
+            except sqlite3.IntegrityError:
+                raise DuplicateJob(job_id)
+        return job_id
+
+    def lease(self, owner, limit, visibility):
+        """Up to `limit` visible jobs as (job_id, data, deliveries), oldest first."""
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT id, body, deliveries FROM jobs WHERE visible_at <= ? ORDER BY seq LIMIT ?",
+                    (now, limit)
+                ).fetchall()
+                self._db.executemany(
+                    "UPDATE jobs SET visible_at = ?, deliveries = deliveries + 1, owner = ? WHERE id = ?",
+                    [(now + visibility, owner, job_id) for job_id, _, _ in rows]
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return [(job_id, json.loads(body), deliveries + 1) for job_id, body, deliveries in rows]
+
+    def extend(self, job_id, visibility):
+        with self._lock:
+            self._db.execute("UPDATE jobs SET visible_at = ? WHERE id = ?", (time.time() + visibility, job_id))
+
+    def ack(self, job_id):
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def nack(self, job_id, delay=0):
+        """Make a leased job visible again after `delay` seconds."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET visible_at = ?, owner = NULL WHERE id = ?", (time.time() + delay, job_id)
+            )
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT visible_at, deliveries, owner, cancelled FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        visible_at, deliveries, owner, cancelled = row
+        leased = owner is not None and visible_at > time.time()
+        return _info(job_id, leased, deliveries, owner, cancelled)
+
+    def cancel(self, job_id):
+        """
+        ("removed", data) for a job that was waiting, ("requested", None)
+        for a leased one, None when the job is unknown.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT body, visible_at, owner FROM jobs WHERE id = ?", (job_id,)
+                ).fetchone()
+                if row is None:
+                    outcome = None
+                elif row[2] is None or row[1] <= time.time():
+                    self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                    outcome = ("removed", json.loads(row[0]))
+                else:
+                    self._db.execute("UPDATE jobs SET cancelled = 1 WHERE id = ?", (job_id,))
+                    outcome = ("requested", None)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return outcome
+
+    def cancelled(self, job_ids):
+        """The IDs among `job_ids` that were cancelled while leased."""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return set()
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id FROM jobs WHERE cancelled = 1 AND id IN ({','.join('?' * len(job_ids))})", job_ids
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def depth(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs WHERE visible_at <= ?", (time.time(),)).fetchone()[0]
+
+
+# Queues a job unless its ID is already there
+_PUSH_LUA = """
+if redis.call('HSETNX', KEYS[2], ARGV[1], ARGV[2]) == 0 then return 0 end
+redis.call('LPUSH', KEYS[1], ARGV[1])
+return 1
+"""
+
+# Moves expired leases back to the ready list, then leases up to ARGV[3] jobs to ARGV[4]
+_LEASE_LUA = """
+local ready, leased, jobs, deliveries, owners = KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5]
+local now, visibility, limit = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', leased, '-inf', now)) do
+    redis.call('ZREM', leased, id)
+    redis.call('RPUSH', ready, id)
+end
+local out = {}
+for i = 1, limit do
+    local id = redis.call('RPOP', ready)
+    if not id then break end
+    local body = redis.call('HGET', jobs, id)
+    if body then
+        redis.call('ZADD', leased, now + visibility, id)
+        redis.call('HSET', owners, id, ARGV[4])
+        local count = redis.call('HINCRBY', deliveries, id, 1)
+        table.insert(out, id)
+        table.insert(out, body)
+        table.insert(out, count)
+    end
+end
+return out
+"""
+
+# Deletes a job still in the ready list, otherwise flags it for its node
+_CANCEL_LUA = """
+local ready, jobs, deliveries, owners, cancelled = KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5]
+local body = redis.call('HGET', jobs, ARGV[1])
+if not body then return nil end
+if redis.call('LREM', ready, 0, ARGV[1]) > 0 then
+    redis.call('HDEL', jobs, ARGV[1])
+    redis.call('HDEL', deliveries, ARGV[1])
+    redis.call('HDEL', owners, ARGV[1])
+    return {'removed', body}
+end
+redis.call('SADD', cancelled, ARGV[1])
+return {'requested'}
+"""
+
+
+class RedisBroker:
+    """
+    The same queue on Redis (or anything speaking its protocol and Lua):
+    a ready list, a sorted set of leases by expiry, hashes for bodies,
+    delivery counts and lease owners, and a set of cancelled leased jobs.
+    Pushing, leasing and cancelling are atomic scripts, so nodes never get
+    the same job at the same time.
+    """
+
+    def __init__(self, url, queue=BROKER_QUEUE):
+        import redis  # only needed for this backend
+
+        self._redis = redis.Redis.from_url(url)
+        self._ready, self._leased, self._jobs, self._deliveries, self._owners, self._cancelled = (
+            f"{queue}:{name}" for name in ("ready", "leased", "jobs", "deliveries", "owners", "cancelled")
+        )
+        self._push = self._redis.register_script(_PUSH_LUA)
+        self._lease = self._redis.register_script(_LEASE_LUA)
+        self._cancel = self._redis.register_script(_CANCEL_LUA)
+
+    def push(self, data):
+        job_id = data.get("job_id") or uuid.uuid4().hex
+        body = json.dumps({**data, "job_id": job_id})
+        if not self._push(keys=[self._ready, self._jobs], args=[job_id, body]):
+            raise DuplicateJob(job_id)
+        return job_id
+
+    def lease(self, owner, limit, visibility):
+        if limit <= 0:
+            return []
+        values = self._lease(
+            keys=[self._ready, self._leased, self._jobs, self._deliveries, self._owners],
+            args=[time.time(), visibility, limit, owner]
+        )
+        return [
+            (values[i].decode(), json.loads(values[i + 1]), int(values[i + 2]))
+            for i in range(0, len(values), 3)
+        ]
+
+    def extend(self, job_id, visibility):
+        self._redis.zadd(self._leased, {job_id: time.time() + visibility}, xx=True)
+
+    def ack(self, job_id):
+        pipe = self._redis.pipeline()
+        pipe.zrem(self._leased, job_id)
+        pipe.hdel(self._jobs, job_id)
+        pipe.hdel(self._deliveries, job_id)
+        pipe.hdel(self._owners, job_id)
+        pipe.srem(self._cancelled, job_id)
+        pipe.execute()
+
+    def nack(self, job_id, delay=0):
+        # Expired leases are requeued by the next lease() call
+        pipe = self._redis.pipeline()
+        pipe.hdel(self._owners, job_id)
+        pipe.zadd(self._leased, {job_id: time.time() + delay})
+        pipe.execute()
+
+    def get(self, job_id):
+        pipe = self._redis.pipeline()
+        pipe.hexists(self._jobs, job_id)
+        pipe.zscore(self._leased, job_id)
+        pipe.hget(self._deliveries, job_id)
+        pipe.hget(self._owners, job_id)
+        pipe.sismember(self._cancelled, job_id)
+        exists, expires_at, deliveries, owner, cancelled = pipe.execute()
+        if not exists:
+            return None
+        leased = owner is not None and expires_at is not None and expires_at > time.time()
+        return _info(job_id, leased, int(deliveries or 0), owner.decode() if owner else None, cancelled)
+
+    def cancel(self, job_id):
+        outcome = self._cancel(
+            keys=[self._ready, self._jobs, self._deliveries, self._owners, self._cancelled], args=[job_id]
+        )
+        if not outcome:
+            return None
+        if outcome[0] == b"removed":
+            return "removed", json.loads(outcome[1])
+        return "requested", None
+
+    def cancelled(self, job_ids):
+        job_ids = list(job_ids)
+        if not job_ids:
+            return set()
+        pipe = self._redis.pipeline()
+        for job_id in job_ids:
+            pipe.sismember(self._cancelled, job_id)
+        return {job_id for job_id, flagged in zip(job_ids, pipe.execute()) if flagged}
+
+    def depth(self):
+        return self._redis.llen(self._ready)
+
+
+def create_broker(url=BROKER_URL):
+    """
+    `redis://...` / `rediss://...`, or `sqlite:///relative/path`,
+    `sqlite:////absolute/path` and `sqlite://:memory:` (in-process).
+    """
+    scheme = urlparse(url).scheme
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisBroker(url)
+    if scheme == "sqlite":
+        if url in ("sqlite://", "sqlite://:memory:", "sqlite:///:memory:"):
+            return SQLiteBroker(":memory:")
+        return SQLiteBroker(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported BROKER_URL: {url}")
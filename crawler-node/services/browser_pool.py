@@ -0,0 +1,172 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import psutil
+from playwright.async_api import async_playwright
+
+from config import DEBUG_MODE, BROWSER_POOL_SIZE, BROWSER_MAX_CONTEXTS, BROWSER_MAX_RSS_MB, BROWSER_MAX_DRAINING
+from utils.metrics import BROWSER_LAUNCH, process_tree_rss
+
+
+def _child_pids():
+    try:
+        return {child.pid for child in psutil.Process().children(recursive=True)}
+    except psutil.Error:
+        return set()
+
+
+class _BrowserSlot:
+    def __init__(self):
+        self.browser = None
+        self.pids = []   # root processes of the current browser
+        self.served = 0  # contexts handed out by the current browser
+
+    def rss(self):
+        return sum(process_tree_rss(pid) for pid in self.pids)
+
+
+class BrowserPool:
+    """
+    Process-wide pool of warm Chromium instances.
+
+    Playwright objects are bound to the event loop that created them, so the
+    pool is only used from the node runtime's loop (services/runtime.py),
+    with one Playwright driver for all jobs. Jobs get an isolated
+    BrowserContext; a browser is recycled after `max_contexts` contexts or
+    when its own process tree passes `max_rss_mb`.
+
+    A recycled browser that still has contexts keeps serving them until they
+    finish ("draining"). At most `max_draining` browsers drain at once;
+    beyond that a browser due for recycling keeps serving new contexts
+    until one of them is closed.
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, max_contexts=BROWSER_MAX_CONTEXTS, max_rss_mb=BROWSER_MAX_RSS_MB,
+                 max_draining=BROWSER_MAX_DRAINING):
+        self.size = max(1, size)
+        self.max_contexts = max_contexts
+        self.max_rss_mb = max_rss_mb
+        self.max_draining = max(1, max_draining)
+        self._slots = [_BrowserSlot() for _ in range(self.size)]
+        self._draining = set()
+        self._opening = {}  # browser -> contexts acquired but not created yet
+        self._playwright = None
+        self._lock = None  # asyncio.Lock, created on the runtime loop
+
+    async def _launch(self, slot):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        before = _child_pids()
+        started_at = time.perf_counter()
+        slot.browser = await self._playwright.chromium.launch(
+            headless=not DEBUG_MODE,
+            slow_mo=200 if DEBUG_MODE else 0
+        )
+        BROWSER_LAUNCH.observe(time.perf_counter() - started_at)
+        slot.served = 0
+
+        # The new processes whose parent is not new themselves are the browser's roots
+        launched = _child_pids() - before
+        slot.pids = []
+        for pid in launched:
+            try:
+                if psutil.Process(pid).ppid() not in launched:
+                    slot.pids.append(pid)
+            except psutil.Error:
+                continue
+
+    def _over_memory(self, slot):
+        if not self.max_rss_mb:
+            return False
+        return slot.rss() > self.max_rss_mb * 1024 * 1024
+
+    async def _close(self, browser):
+        self._draining.discard(browser)
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+    def _in_use(self, browser):
+        return len(browser.contexts) + self._opening.get(browser, 0)
+
+    def _is_current(self, browser):
+        return any(slot.browser is browser for slot in self._slots)
+
+    async def _acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            # Prefer empty slots, then the browser with the fewest open contexts
+            slot = min(
+                self._slots,
+                key=lambda s: (s.browser is not None, self._in_use(s.browser) if s.browser else 0)
+            )
+
+            browser = slot.browser
+            if browser is not None and not browser.is_connected():
+                slot.browser = None
+                await self._close(browser)
+            elif browser is not None and (slot.served >= self.max_contexts or self._over_memory(slot)):
+                # Close straight away when idle, otherwise the last context to
+                # finish on it closes it in _release()
+                if not self._in_use(browser):
+                    slot.browser = None
+                    await self._close(browser)
+                elif len(self._draining) < self.max_draining:
+                    slot.browser = None
+                    self._draining.add(browser)
+
+            if slot.browser is None:
+                await self._launch(slot)
+
+            slot.served += 1
+            # Counted as in use until its context exists, so nothing closes it meanwhile
+            self._opening[slot.browser] = self._opening.get(slot.browser, 0) + 1
+            return slot.browser
+
+    def _opened(self, browser):
+        self._opening[browser] -= 1
+        if not self._opening[browser]:
+            del self._opening[browser]
+
+    async def _release(self, browser, context):
+        if context is not None:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+        if not self._is_current(browser) and not self._in_use(browser):
+            await self._close(browser)
+
+    @asynccontextmanager
+    async def context(self, **kwargs):
+        """Yield a fresh BrowserContext from one of the pooled browsers."""
+        browser = await self._acquire()
+        try:
+            context = await browser.new_context(**kwargs)
+        except BaseException:
+            self._opened(browser)
+            await self._release(browser, None)
+            raise
+        self._opened(browser)
+        try:
+            yield context
+        finally:
+            await self._release(browser, context)
+
+    def live_browsers(self):
+        return sum(1 for slot in self._slots if slot.browser is not None and slot.browser.is_connected())
+
+    def live_pages(self):
+        return sum(
+            len(context.pages)
+            for slot in self._slots if slot.browser is not None
+            for context in slot.browser.contexts
+        )
+
+
+browser_pool = BrowserPool()
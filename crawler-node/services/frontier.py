@@ -0,0 +1,117 @@
+import fnmatch
+import hashlib
+import re
+from collections import deque
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = frozenset({
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "igshid", "spm", "ref_src",
+})
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url):
+    """
+    Canonical form of a URL for deduplication: lower-case scheme and host,
+    no default port, no fragment, sorted query without tracking parameters.
+    Returns None for anything that is not http(s).
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except (AttributeError, ValueError):
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    netloc = parts.hostname.lower()
+    if port and port != _DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+class VisitedSet:
+    """Set of URLs kept as 8-byte digests, a fraction of the memory of the strings."""
+
+    def __init__(self):
+        self._digests = set()
+
+    @staticmethod
+    def _digest(url):
+        return hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+
+    def add(self, url):
+        """Add `url`; returns False when it was already present."""
+        digest = self._digest(url)
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+
+    def __contains__(self, url):
+        return self._digest(url) in self._digests
+
+    def __len__(self):
+        return len(self._digests)
+
+
+class FollowRules:
+    """
+    Decides which discovered links the frontier follows: optionally only the
+    seeds' hosts, and, when given, only links matching one of the regexes or
+    globs.
+    """
+
+    def __init__(self, seeds, same_domain=True, regex=None, glob=None):
+        self.hosts = {urlsplit(seed).hostname for seed in seeds} if same_domain else None
+        patterns = list(regex or []) + [fnmatch.translate(pattern) for pattern in glob or []]
+        self.pattern = re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
+
+    def allows(self, url):
+        if self.hosts is not None and urlsplit(url).hostname not in self.hosts:
+            return False
+        return self.pattern is None or self.pattern.search(url) is not None
+
+
+class Frontier:
+    """
+    Breadth-first queue of (url, depth) bounded by `max_depth` and
+    `max_pages`. Every URL seen is remembered, so links are reported and
+    crawled at most once per job.
+    """
+
+    def __init__(self, max_depth, max_pages):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.seen = VisitedSet()
+        self.scheduled = 0
+        self._queue = deque()
+
+    def discover(self, url):
+        """Record a link; returns its canonical form when it is new, else None."""
+        url = canonicalize_url(url)
+        if url is None or not self.seen.add(url):
+            return None
+        return url
+
+    def schedule(self, url, depth):
+        if depth > self.max_depth or (self.max_pages and self.scheduled >= self.max_pages):
+            return False
+        self._queue.append((url, depth))
+        self.scheduled += 1
+        return True
+
+    def pop(self):
+        return self._queue.popleft() if self._queue else None
+
+    def __len__(self):
+        return len(self._queue)
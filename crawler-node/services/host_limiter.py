@@ -0,0 +1,183 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+from config import (
+    HOST_RATE, HOST_BURST, HOST_MAX_CONCURRENCY, HOST_SLOW_SECONDS, HOST_BACKOFF_MAX,
+    ROBOTS_CRAWL_DELAY, ROBOTS_CACHE_TTL, MAX_TRACKED_HOSTS
+)
+from services import http_fetcher
+from utils.metrics import HOST_BACKOFFS, host_label
+
+_ROBOTS_USER_AGENT = "Mozilla/5.0 (compatible; CrawlerNode)"
+
+
+class _HostState:
+    def __init__(self, burst, max_concurrency):
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.pages = asyncio.Semaphore(max_concurrency)
+        self.active = 0             # requests waiting for or holding a slot
+        self.backoff = 1.0          # multiplier on the request interval
+        self.blocked_until = 0.0    # monotonic time, from Retry-After
+        self.robots_delay = 0.0
+        self.robots_checked = 0.0
+        self.robots_lock = asyncio.Lock()
+
+
+class _Permit:
+    """Handed out by `HostLimiter.slot()`; report the response through `observe()`."""
+
+    def __init__(self, limiter, host, state):
+        self._limiter = limiter
+        self._host = host
+        self._state = state
+        self._started_at = time.monotonic()
+        self.observed = False
+
+    def observe(self, status, retry_after=None):
+        self.observed = True
+        self._limiter._observe(self._host, self._state, status, time.monotonic() - self._started_at, retry_after)
+
+
+class HostLimiter:
+    """
+    Node-wide politeness shared by every job.
+
+    Each host gets a token bucket (`rate` requests per second, bursts of
+    `burst`), at most `max_concurrency` pages navigating at once and, when
+    enabled, the Crawl-delay from its robots.txt (cached for
+    ROBOTS_CACHE_TTL). A 429/503 doubles the host's request interval and
+    honours Retry-After; slow or failed responses raise it by half; every
+    fast success eases it back towards the base rate.
+
+    Per-job `crawl_delay` (HostPoliteness) still applies on top of this.
+    """
+
+    def __init__(self, rate=HOST_RATE, burst=HOST_BURST, max_concurrency=HOST_MAX_CONCURRENCY, max_hosts=MAX_TRACKED_HOSTS):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_hosts = max_hosts
+        self._hosts = OrderedDict()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.burst, self.max_concurrency)
+            # Forget the least recently used idle hosts
+            excess = len(self._hosts) - self.max_hosts
+            if excess > 0:
+                now = time.monotonic()
+                idle = []
+                for oldest, oldest_state in self._hosts.items():
+                    if len(idle) >= excess:
+                        break
+                    if oldest != host and self._forgettable(oldest_state, now):
+                        idle.append(oldest)
+                for oldest in idle:
+                    del self._hosts[oldest]
+        else:
+            self._hosts.move_to_end(host)
+        return state
+
+    @staticmethod
+    def _forgettable(state, now):
+        """No requests in flight, no Retry-After pending and no backoff still in effect."""
+        if state.active or state.blocked_until > now:
+            return False
+        return state.backoff <= 1.0 or now - state.updated > HOST_BACKOFF_MAX
+
+    def _interval(self, state):
+        interval = max(1 / self.rate if self.rate > 0 else 0.0, state.robots_delay)
+        return min(interval * state.backoff, HOST_BACKOFF_MAX)
+
+    async def _robots_delay(self, url, state):
+        if not ROBOTS_CRAWL_DELAY:
+            return
+        async with state.robots_lock:
+            if state.robots_checked and time.monotonic() - state.robots_checked < ROBOTS_CACHE_TTL:
+                return
+            state.robots_checked = time.monotonic()
+            parsed = urlparse(url)
+            try:
+                response = await http_fetcher.get_client().get(
+                    f"{parsed.scheme}://{parsed.netloc}/robots.txt",
+                    headers={"User-Agent": _ROBOTS_USER_AGENT},
+                    timeout=5
+                )
+            except Exception:
+                state.robots_delay = 0.0
+                return
+            if response.status_code != 200:
+                state.robots_delay = 0.0
+                return
+            parser = RobotFileParser()
+            parser.parse(response.text.splitlines())
+            parser.modified()  # crawl_delay() ignores parsers that never "fetched"
+            delay = parser.crawl_delay(_ROBOTS_USER_AGENT)
+            rate = parser.request_rate(_ROBOTS_USER_AGENT)
+            if rate and rate.requests:
+                delay = max(delay or 0, rate.seconds / rate.requests)
+            state.robots_delay = float(delay or 0)
+
+    async def _take_token(self, state):
+        while True:
+            now = time.monotonic()
+            if state.blocked_until > now:
+                await asyncio.sleep(state.blocked_until - now)
+                continue
+            interval = self._interval(state)
+            if not interval:
+                return
+            state.tokens = min(self.burst, state.tokens + (now - state.updated) / interval)
+            state.updated = now
+            if state.tokens >= 1:
+                state.tokens -= 1
+                return
+            await asyncio.sleep((1 - state.tokens) * interval)
+
+    def _observe(self, host, state, status, elapsed, retry_after=None):
+        if status in (429, 503):
+            state.backoff = min(state.backoff * 2, 64.0)
+            try:
+                wait = float(retry_after) if retry_after else 0.0
+            except ValueError:
+                wait = 0.0  # HTTP-date form, the doubled interval covers it
+            state.blocked_until = max(state.blocked_until, time.monotonic() + min(wait, HOST_BACKOFF_MAX))
+            HOST_BACKOFFS.labels(host_label(host), str(status)).inc()
+        elif status is None or elapsed > HOST_SLOW_SECONDS:
+            state.backoff = min(state.backoff * 1.5, 64.0)
+            HOST_BACKOFFS.labels(host_label(host), "slow" if status is not None else "failed").inc()
+        else:
+            state.backoff = max(1.0, state.backoff * 0.9)
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """
+        Wait for a page slot and a token for `url`'s host. The body should
+        call `permit.observe(status, retry_after)` with the response; a body
+        that raises counts as a failed request.
+        """
+        host = urlparse(url).netloc
+        state = self._state(host)
+        state.active += 1
+        try:
+            await self._robots_delay(url, state)
+            async with state.pages:
+                await self._take_token(state)
+                permit = _Permit(self, host, state)
+                try:
+                    yield permit
+                except Exception:
+                    if not permit.observed:
+                        permit.observe(None)
+                    raise
+        finally:
+            state.active -= 1
+
+
+host_limiter = HostLimiter()
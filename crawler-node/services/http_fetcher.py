@@ -0,0 +1,28 @@
+import httpx
+
+from config import HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE
+
+_client = None
+
+
+def get_client():
+    """
+    Shared keep-alive HTTP client.
+
+    Created lazily on first use so it binds to the crawler event loop.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=httpx.Timeout(15.0),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE
+            )
+        )
+    return _client
+
+
+async def fetch(url, headers=None, timeout=15):
+    return await get_client().get(url, headers=headers, timeout=timeout)
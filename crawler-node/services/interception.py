@@ -0,0 +1,85 @@
+from urllib.parse import urlparse
+
+from config import DEFAULT_BLOCK_PROFILE
+
+# Playwright resource types that can be blocked by name, plus "tracker"
+BLOCKABLE_TYPES = {"image", "font", "media", "stylesheet", "texttrack", "eventsource", "websocket", "manifest", "other", "tracker"}
+
+BLOCK_PROFILES = {
+    "none": [],
+    "light": ["media", "font", "tracker"],
+    "aggressive": ["image", "font", "media", "stylesheet", "tracker"],
+}
+
+# Analytics, ads and tag-manager hosts (subdomains match too)
+TRACKER_DOMAINS = frozenset({
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googletagservices.com",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "mixpanel.com",
+    "segment.io",
+    "segment.com",
+    "amplitude.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "criteo.com",
+    "criteo.net",
+    "taboola.com",
+    "outbrain.com",
+    "adnxs.com",
+    "amazon-adsystem.com",
+    "mc.yandex.ru",
+    "yektanet.com",
+    "mediaad.org",
+    "najva.com",
+    "pushe.co",
+})
+
+
+def resolve_block_types(block):
+    """
+    Turn `options.block` (a profile name, or a list of resource types and
+    profile names) into a set of blocked types.
+    """
+    if block is None:
+        block = DEFAULT_BLOCK_PROFILE
+    if isinstance(block, str):
+        block = [item.strip() for item in block.split(",") if item.strip()]
+
+    types = set()
+    for item in block or []:
+        if item in BLOCK_PROFILES:
+            types.update(BLOCK_PROFILES[item])
+        elif item in BLOCKABLE_TYPES:
+            types.add(item)
+    return types
+
+
+def is_tracker(url):
+    host = urlparse(url).hostname or ""
+    labels = host.split(".")
+    return any(".".join(labels[i:]) in TRACKER_DOMAINS for i in range(len(labels) - 1))
+
+
+async def apply_block_profile(context, block):
+    types = resolve_block_types(block)
+    if not types:
+        return
+
+    block_trackers = "tracker" in types
+
+    async def handle(route, request):
+        if request.resource_type in types or (block_trackers and is_tracker(request.url)):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handle)
@@ -0,0 +1,55 @@
+import threading
+
+from config import SHUTDOWN_GRACE, SHUTDOWN_FLUSH_TIMEOUT, QUEUE_MODE
+from services.puller import job_puller
+from services.scheduler import scheduler
+from utils.sender import send_result_to_laravel, result_sender
+
+_shutdown_lock = threading.Lock()
+_shut_down = False
+
+
+def start_node():
+    """Background services of a serving node."""
+    result_sender.start()  # resumes delivering results left in the outbox
+    if QUEUE_MODE == "pull":
+        job_puller.start()
+
+
+def shutdown_node(grace=SHUTDOWN_GRACE, flush_timeout=SHUTDOWN_FLUSH_TIMEOUT):
+    """
+    Graceful stop: refuse new jobs, hand queued jobs back to Laravel as 503
+    results so they can be dispatched to another node (in pull mode they go
+    back to the broker instead), give running jobs `grace` seconds to finish
+    and flush the outbox.
+
+    Results still undelivered stay in the outbox and go out on the next start.
+    """
+    global _shut_down
+    with _shutdown_lock:
+        if _shut_down:
+            return
+        _shut_down = True
+
+    print("⚠️ Shutting down: no longer accepting crawl jobs")
+    if QUEUE_MODE == "pull":
+        job_puller.stop()
+    handed_back, still_running = scheduler.shutdown(grace)
+
+    for crawler, data in handed_back:
+        send_result_to_laravel({
+            "type": data.get("type") or getattr(crawler, "crawler_type", None),
+            "original_url": data.get("urls"),
+            "final_url": '',
+            "error": 'Crawler node shutting down, retry on another node',
+            "meta": data.get("meta"),
+            "is_last": True,
+            "status_code": 503
+        })
+    if handed_back:
+        print(f"⚠️ Handed back {len(handed_back)} queued job(s)")
+    if still_running:
+        print(f"⚠️ {still_running} job(s) still running after {grace}s, their remaining results are lost")
+
+    if not result_sender.flush(flush_timeout):
+        print("⚠️ Outbox not drained before shutdown, delivery resumes on next start")
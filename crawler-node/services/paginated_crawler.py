@@ -1,15 +1,16 @@
 import asyncio
-from playwright.async_api import async_playwright
+from urllib.parse import urljoin
 from services.base_crawler import BaseCrawler
-from utils.sender import send_result_to_laravel
-from config import DEBUG_MODE
+from services.pagination import visited_key, page_url, infer_page_template
+from services.readiness import HostPoliteness
+from utils.metrics import record_error
+from config import MAX_JOB_CONCURRENCY
 
 
 class PaginatedCrawler(BaseCrawler):
-    def crawl(self, config):
-        return asyncio.run(self._crawl_paginated(config))
+    crawler_type = "paginated"
 
-    async def _crawl_paginated(self, config):
+    async def crawl(self, config):
         try:
             urls = config.get("urls")
             if not urls or not isinstance(urls, list):
@@ -21,7 +22,7 @@ class PaginatedCrawler(BaseCrawler):
                     "is_last": True,
                     'status_code' : 400
                 }
-                send_result_to_laravel(result)
+                await self.send(result)
                 return '',400
                 
             next_selector = config.get("next_page_selector")
@@ -34,11 +35,12 @@ class PaginatedCrawler(BaseCrawler):
                     "is_last": True,
                     'status_code' : 400
                 }
-                send_result_to_laravel(result)
+                await self.send(result)
                 return '',400                
 
             options = config.get("options", {})
             delay = int(options.get("crawl_delay", 1))
+            self.politeness = HostPoliteness(delay)
             limit = int(options.get("limit", 50))
             headers = options.get("headers", {})
             selectors = options.get("selectors", [])  # Ensure this is a list
@@ -51,99 +53,165 @@ class PaginatedCrawler(BaseCrawler):
                     "Chrome/119.0.0.0 Safari/537.36"
                 )
 
+            concurrency = max(1, min(int(options.get("concurrency", 1)), MAX_JOB_CONCURRENCY))
+            template = options.get("page_url_template")
+            parallel = bool(template) or options.get("pagination") == "parallel"
+
             count = 0
+            held = None
+            crashed_pages = set()
 
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
-                    headless=not DEBUG_MODE,
-                    slow_mo=200 if DEBUG_MODE else 0
-                )
-                context = await browser.new_context(extra_http_headers=headers)
+            async def open_page(context):
                 page = await context.new_page()
-
-                for index, url in enumerate(urls):
-                    current_url = url
-                    while current_url and count < limit:
-                        try:
-                            await page.goto(current_url, timeout=15000)
-                            await page.wait_for_load_state("networkidle")
-                            await asyncio.sleep(delay)
-
-                            extracted_data = {}
-                            for selector_item in selectors:
-                                field = selector_item.get("key")
-                                selector = selector_item.get("selector")
-                                full_html = selector_item.get("full_html", False)
-
-                                if not field or not selector:
-                                    continue
-
-                                try:
-                                    elements = await page.query_selector_all(selector)
-                                    field_contents = []
-
-                                    for element in elements:
-                                        try:
-                                            if full_html:
-                                                content = await element.inner_html()
-                                            else:
-                                                raw_text = await element.text_content()
-                                                content = ' '.join([
-                                                    t.strip() for t in raw_text.split('\n')
-                                                    if t.strip() and t not in ('== %0', '⇔')
-                                                ]) if raw_text else None
-                                            if content:
-                                                field_contents.append(content.strip())
-                                        except Exception:
-                                            continue
-
-                                    extracted_data[field] = field_contents  # this will be a list of values
-                                except Exception:
-                                    extracted_data[field] = []
-
-
-                            result = {
-                                "type": "paginated",
-                                "original_url": url,
-                                "final_url": page.url,
-                                "content": extracted_data,
-                                "meta": config.get("meta"),
-                                "is_last": index == len(urls) - 1,
-                                'status_code': 200
-                            }
-                        
-                            send_result_to_laravel(result)
+                page.on("crash", crashed_pages.add)
+                return page
+
+            async def replace_broken(pages):
+                # A crashed or closed page would fail every url it is given
+                for i, page in enumerate(pages):
+                    if page.is_closed() or page in crashed_pages:
+                        await self._discard_page(page)
+                        pages[i] = await open_page(page.context)
+
+            async def emit(result):
+                # Hold one result back so that only the very last one carries is_last
+                nonlocal held
+                if held is not None:
+                    held["is_last"] = False
+                    await self.send(held)
+                held = result
+
+            async def crawl_page(page, current_url, url):
+                try:
+                    await self.goto(page, current_url, options, selectors, timeout=15000)
+                    extracted_data = await self.extract(page, selectors, options)
+                    return {
+                        "type": "paginated",
+                        "original_url": url,
+                        "final_url": page.url,
+                        "content": extracted_data,
+                        "meta": config.get("meta"),
+                        'status_code': 200
+                    }
+                except Exception as page_error:
+                    record_error("paginated", page_error)
+                    return {
+                        "type": "paginated",
+                        "original_url": url,
+                        "error": str(page_error),
+                        "meta": config.get("meta"),
+                        'status_code': 500
+                    }
+
+            async def next_page_url(page):
+                next_btn = await page.query_selector(next_selector)
+                if not next_btn:
+                    return None
+                href = await next_btn.get_attribute("href")
+                if href and href != "#" and not href.startswith("javascript:"):
+                    return urljoin(page.url, href)
+                # Script-driven next button: click it and follow the navigation
+                async with page.expect_navigation(timeout=15000):
+                    await next_btn.click()
+                return page.url
+
+            async def walk(pages, url, current_url, visited, max_pages, followed):
+                """Follow the next button from current_url on pages[0]; returns the next url not crawled yet."""
+                nonlocal count
+                crawled = 0
+                while current_url and count < limit and crawled < max_pages:
+                    if visited_key(current_url) in visited:
+                        print(f"⚠️ Pagination cycle on {current_url}, stopping")
+                        return None
+                    visited.add(visited_key(current_url))
+
+                    await replace_broken(pages)
+                    page = pages[0]
+                    result = await crawl_page(page, current_url, url)
+                    await emit(result)
+                    count += 1
+                    crawled += 1
+                    if "error" in result:
+                        return None
+
+                    visited.add(visited_key(page.url))
+                    try:
+                        current_url = await next_page_url(page)
+                    except Exception:
+                        return None
+                    if current_url:
+                        followed.append(current_url)
+                return current_url
+
+            async def crawl_numbered(pages, url, template, number, visited):
+                """
+                Crawl template pages from `number` on, a wave of len(pages) at a
+                time, until one is past the last page or fails. The pages of a
+                wave fetched before the end are still sent, also those after a
+                failed one.
+                """
+                nonlocal count
+                while count < limit:
+                    await replace_broken(pages)
+                    wave = range(number, number + min(len(pages), limit - count))
+                    results = await asyncio.gather(*(
+                        crawl_page(page, page_url(template, n), url) for page, n in zip(pages, wave)
+                    ))
+                    failed = False
+                    for result in results:
+                        if "error" in result:
+                            await emit(result)
                             count += 1
-
-                            next_btn = await page.query_selector(next_selector)
-                            if next_btn:
-                                    try:
-                                        await asyncio.gather(
-                                            page.wait_for_navigation(),
-                                            next_btn.click()
-                                        )
-                                        current_url = page.url
-                                    except Exception:
-                                        href = await next_btn.get_attribute("href")
-                                        if href:
-                                            from urllib.parse import urljoin
-                                            current_url = urljoin(page.url, href)
-                                        else:
-                                            break
-                                    else:
-                                        break
-                        except Exception as page_error:  # Renamed to avoid confusion
-                            error_result = {
-                            "type": "paginated",
-                            "original_url": url,
-                            "error": str(page_error),
-                            "meta": config.get("meta"),
-                            "is_last": index == len(urls) - 1,
-                            'status_code': 500
-                            }
-                            send_result_to_laravel(error_result)
-
-                await browser.close()
+                            failed = True
+                            continue
+                        # Past the last page: nothing matched, or redirected somewhere already seen
+                        content = result["content"]
+                        if (content and not any(content.values())) or visited_key(result["final_url"]) in visited:
+                            return
+                        visited.add(visited_key(result["final_url"]))
+                        await emit(result)
+                        count += 1
+                    if failed:
+                        return
+                    number += len(wave)
+
+            async with self.new_context(headers, options) as context:
+                pages = [await open_page(context)]
+
+                for url in urls:
+                    if count >= limit:
+                        break
+                    visited = set()
+                    followed = []
+
+                    if not parallel:
+                        await walk(pages, url, url, visited, limit, followed)
+                        continue
+
+                    if template:
+                        # Page 1 is the url itself, the template provides the rest
+                        await walk(pages, url, url, visited, 1, followed)
+                        if held is not None and "error" in held:
+                            continue  # the template pages would fail the same way
+                        first_page = int(options.get("start_page", 2))
+                        page_template = template
+                    else:
+                        # Learn the URL pattern from the first two next links
+                        next_url = await walk(pages, url, url, visited, 2, followed)
+                        inferred = infer_page_template(*followed[:2]) if len(followed) >= 2 else None
+                        if not inferred:
+                            await walk(pages, url, next_url, visited, limit, followed)
+                            continue
+                        page_template, number = inferred
+                        first_page = number + 1
+
+                    while len(pages) < concurrency:
+                        pages.append(await open_page(context))
+                    await crawl_numbered(pages, url, page_template, first_page, visited)
+
+            if held is not None:
+                held["is_last"] = True
+                await self.send(held)
 
         except Exception as e:
             return {"status": "error", "message": str(e)}
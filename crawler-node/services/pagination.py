@@ -0,0 +1,34 @@
+import re
+from urllib.parse import urldefrag
+
+_NUMBER = re.compile(r"\d+")
+
+
+def visited_key(url):
+    # Fragments never change the page a next link points to
+    return urldefrag(url)[0].rstrip("/")
+
+
+def page_url(template, page):
+    return template.replace("{page}", str(page))
+
+
+def infer_page_template(second_url, third_url):
+    """
+    Work out a page URL template from the links to page 2 and page 3.
+
+    Tries every number in `second_url` (`?page=2`, `/page/2`, ...) and
+    returns `(template, page_number)` for the first one that, incremented,
+    yields `third_url`. Returns None when no single page counter explains the
+    two links (offset counters like `?start=20` are not recognised).
+    """
+    if not second_url or not third_url:
+        return None
+
+    second_url, third_url = visited_key(second_url), visited_key(third_url)
+    for match in _NUMBER.finditer(second_url):
+        number = int(match.group())
+        template = second_url[:match.start()] + "{page}" + second_url[match.end():]
+        if page_url(template, number + 1) == third_url:
+            return template, number
+    return None
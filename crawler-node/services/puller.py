@@ -0,0 +1,168 @@
+import threading
+import time
+
+from config import (
+    NODE_ID, BROKER_VISIBILITY_TIMEOUT, BROKER_POLL_INTERVAL, BROKER_MAX_DELIVERIES
+)
+from services.broker import create_broker
+from services.scheduler import scheduler, QueueFull, ShuttingDown
+from utils.helpers import get_crawler_by_type
+from utils.sender import send_result_to_laravel
+
+
+class JobPuller:
+    """
+    Pull mode: leases jobs from the shared broker, only as many as the
+    scheduler can start right away, so busy nodes take nothing and every
+    added node adds capacity.
+
+    Leases of running jobs are extended while they run and acked when they
+    finish (whatever the outcome, their final result has been sent). Jobs
+    handed back on shutdown are released for another node straight away; a
+    node that dies simply stops extending, and its jobs are redelivered once
+    the visibility timeout passes. A job delivered more than
+    BROKER_MAX_DELIVERIES times is dropped with an error result.
+
+    `get()` and `cancel()` serve GET / DELETE /crawl/<job_id> on any node:
+    a job still waiting in the broker is removed there; a leased one is
+    flagged, and the node running it stops it within a poll interval.
+    """
+
+    def __init__(self, broker=None, visibility=BROKER_VISIBILITY_TIMEOUT, poll_interval=BROKER_POLL_INTERVAL):
+        self._broker = broker
+        self.visibility = visibility
+        self.poll_interval = poll_interval
+        self._leased = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    @property
+    def broker(self):
+        if self._broker is None:
+            self._broker = create_broker()
+        return self._broker
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self.broker  # fail at startup on a bad BROKER_URL
+                self._thread = threading.Thread(target=self._run, name="job-puller", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _done(self, job_id, status):
+        with self._lock:
+            self._leased.discard(job_id)
+        try:
+            if status == "handed_back":
+                self.broker.nack(job_id)
+            else:
+                self.broker.ack(job_id)
+        except Exception as e:
+            print(f"❌ Broker {'release' if status == 'handed_back' else 'ack'} failed for {job_id}: {e}")
+        self._wakeup.set()  # a slot is free, lease again without waiting
+
+    def get(self, job_id):
+        """The job's info while this node runs it, else from the broker, else what this node last knew."""
+        local = scheduler.get(job_id)
+        if local is not None and local["status"] in ("queued", "running"):
+            return local
+        return self.broker.get(job_id) or local
+
+    def cancel(self, job_id):
+        local = scheduler.get(job_id)
+        if local is not None and local["status"] in ("queued", "running"):
+            return scheduler.cancel(job_id)
+
+        outcome = self.broker.cancel(job_id)
+        if outcome is None:
+            return local
+        state, data = outcome
+        if state == "removed":
+            self._reject(job_id, data, "Job cancelled", 499, status="cancelled")
+            return {"job_id": job_id, "type": data.get("type"), "status": "cancelled", "cancel_requested": True}
+        return self.broker.get(job_id)
+
+    def _reject(self, job_id, data, error, status_code, status=None):
+        payload = {
+            "type": data.get("type"),
+            "original_url": data.get("urls"),
+            "final_url": '',
+            "error": error,
+            "job_id": job_id,
+            "meta": data.get("meta"),
+            "is_last": True,
+            "status_code": status_code
+        }
+        if status:
+            payload["status"] = status
+        send_result_to_laravel(payload)
+        self.broker.ack(job_id)
+
+    def _start_job(self, job_id, data, deliveries, cancelled=False):
+        if cancelled:
+            # Cancelled while leased by a node that then went away
+            self._reject(job_id, data, "Job cancelled", 499, status="cancelled")
+            return
+
+        if deliveries > BROKER_MAX_DELIVERIES:
+            self._reject(job_id, data, f"Job failed after {deliveries - 1} deliveries", 500)
+            return
+
+        crawler = get_crawler_by_type(data.get("type"))
+        if not crawler:
+            self._reject(job_id, data, 'Unknown crawler type', 400)
+            return
+
+        with self._lock:
+            self._leased.add(job_id)
+        try:
+            scheduler.submit(crawler, data, on_done=lambda status: self._done(job_id, status))
+        except (QueueFull, ShuttingDown):
+            with self._lock:
+                self._leased.discard(job_id)
+            self.broker.nack(job_id)
+
+    def _extend_leases(self):
+        with self._lock:
+            leased = list(self._leased)
+        for job_id in leased:
+            self.broker.extend(job_id, self.visibility)
+
+    def _stop_cancelled(self):
+        with self._lock:
+            leased = list(self._leased)
+        for job_id in self.broker.cancelled(leased):
+            scheduler.cancel(job_id)  # acked through on_done once stopped
+
+    def _run(self):
+        last_extended = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() - last_extended >= self.visibility / 3:
+                    self._extend_leases()
+                    last_extended = time.monotonic()
+                self._stop_cancelled()
+
+                capacity = 0 if scheduler.closing else scheduler.free_capacity()
+                leases = self.broker.lease(NODE_ID, capacity, self.visibility) if capacity else []
+                cancelled = self.broker.cancelled(job_id for job_id, _, _ in leases)
+                for job_id, data, deliveries in leases:
+                    self._start_job(job_id, data, deliveries, job_id in cancelled)
+                if leases:
+                    continue
+            except Exception as e:
+                print(f"❌ Job puller error: {e}")
+
+            self._wakeup.wait(timeout=self.poll_interval)
+            self._wakeup.clear()
+
+
+job_puller = JobPuller()
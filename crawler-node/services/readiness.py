@@ -0,0 +1,131 @@
+import asyncio
+from urllib.parse import urlparse
+
+from config import DEFAULT_WAIT_UNTIL, READY_TIMEOUT, DOM_QUIET_MS
+
+# options.wait_until -> wait_until passed to page.goto()
+_GOTO_WAIT_UNTIL = {
+    "networkidle": "load",
+    "load": "load",
+    "selectors": "domcontentloaded",
+    "dom_stable": "domcontentloaded",
+    "domcontentloaded": "domcontentloaded",
+}
+
+# Resolves once the DOM had no mutations for `quietMs`, or after `capMs`
+_DOM_STABLE_JS = """
+([quietMs, capMs]) => new Promise(resolve => {
+    let quietTimer;
+    const done = () => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(capTimer);
+        resolve(true);
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(done, quietMs);
+    });
+    observer.observe(document.documentElement || document, {
+        childList: true, subtree: true, attributes: true, characterData: true
+    });
+    quietTimer = setTimeout(done, quietMs);
+    const capTimer = setTimeout(done, capMs);
+})
+"""
+
+# True once every selector matches; invalid CSS does not block readiness
+_SELECTORS_PRESENT_JS = """
+(selectors) => selectors.every(selector => {
+    try {
+        return document.querySelector(selector) !== null;
+    } catch (e) {
+        return true;
+    }
+})
+"""
+
+
+def wait_strategy(options):
+    strategy = options.get("wait_until", DEFAULT_WAIT_UNTIL)
+    return strategy if strategy in _GOTO_WAIT_UNTIL else DEFAULT_WAIT_UNTIL
+
+
+def goto_wait_until(options):
+    return _GOTO_WAIT_UNTIL[wait_strategy(options)]
+
+
+def _selector_list(options, selectors):
+    wait_for = options.get("wait_for")
+    if wait_for:
+        return [wait_for] if isinstance(wait_for, str) else list(wait_for)
+    result = []
+    for item in selectors or []:
+        selector = item.get("selector") if isinstance(item, dict) else item
+        if selector:
+            result.append(selector)
+    return result
+
+
+async def wait_until_ready(page, options, selectors=None):
+    """
+    Wait for the page to be ready for extraction according to
+    `options.wait_until`:
+
+    - networkidle: no network activity for 500 ms (the old behaviour)
+    - load / domcontentloaded: the matching load state, then `options.wait_for` if given
+    - selectors: `options.wait_for`, or every selector of the job, is attached
+    - dom_stable: no DOM mutations for `options.dom_quiet_ms`
+
+    Every wait is capped by `options.ready_timeout` seconds and hitting the cap
+    is not an error: extraction runs on whatever has rendered by then.
+    """
+    strategy = wait_strategy(options)
+    cap = float(options.get("ready_timeout", READY_TIMEOUT))
+    cap_ms = int(cap * 1000)
+
+    try:
+        if strategy == "networkidle":
+            await page.wait_for_load_state("networkidle", timeout=cap_ms)
+
+        elif strategy == "dom_stable":
+            quiet_ms = int(options.get("dom_quiet_ms", DOM_QUIET_MS))
+            await page.evaluate(_DOM_STABLE_JS, [quiet_ms, cap_ms])
+
+        elif strategy == "selectors":
+            wait_for = _selector_list(options, selectors)
+            if wait_for:
+                await page.wait_for_function(_SELECTORS_PRESENT_JS, arg=wait_for, timeout=cap_ms)
+
+        else:
+            await page.wait_for_load_state(strategy, timeout=cap_ms)
+            wait_for = options.get("wait_for")
+            if wait_for:
+                wait_for = [wait_for] if isinstance(wait_for, str) else list(wait_for)
+                await page.wait_for_function(_SELECTORS_PRESENT_JS, arg=wait_for, timeout=cap_ms)
+
+    except Exception as e:
+        # Timeouts and navigations during the wait: extract what is there
+        print(f"⚠️ Readiness wait ({strategy}) cut short on {page.url}: {e}")
+
+
+class HostPoliteness:
+    """
+    Per-job politeness delay: consecutive requests to the same host are
+    spaced at least `delay` seconds apart, requests to other hosts are not
+    delayed at all.
+    """
+
+    def __init__(self, delay):
+        self.delay = max(0.0, float(delay or 0))
+        self._next_slot = {}
+
+    async def wait(self, url):
+        if not self.delay:
+            return
+        host = urlparse(url).netloc
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
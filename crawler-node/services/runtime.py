@@ -0,0 +1,38 @@
+import asyncio
+import threading
+
+
+class Runtime:
+    """
+    The node's single asyncio loop, running in a dedicated thread.
+
+    Playwright objects, the shared HTTP client and every crawl job live on
+    this loop; other threads (request handlers, the sender) hand it work
+    with `submit()` or `run()`.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def loop(self):
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="runtime", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro):
+        """Run a coroutine on the loop and block until it finishes."""
+        return self.submit(coro).result()
+
+
+runtime = Runtime()
@@ -0,0 +1,259 @@
+import asyncio
+import math
+import threading
+import time
+import uuid
+from collections import deque, OrderedDict
+
+from services.runtime import runtime
+from utils.metrics import JOBS, record_error
+from config import WORKER_SLOTS, QUEUE_MAX_SIZE, RETRY_AFTER_SECONDS, DEFAULT_DEADLINE_S, JOB_HISTORY
+
+
+class QueueFull(Exception):
+    pass
+
+
+class ShuttingDown(Exception):
+    pass
+
+
+class _Job:
+    def __init__(self, crawler, data, deadline_s, on_done=None):
+        self.id = data.get("job_id") if isinstance(data.get("job_id"), str) and data.get("job_id") else uuid.uuid4().hex
+        self.crawler = crawler
+        self.data = data
+        self.deadline_s = deadline_s
+        self.status = "queued"  # running | done | failed | timeout | cancelled | handed_back
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.task = None
+        self.cancel_requested = False
+        self.on_done = on_done  # called with the final status, from the runtime loop or shutdown()
+
+    def info(self):
+        now = time.monotonic()
+        return {
+            "job_id": self.id,
+            "type": self.data.get("type"),
+            "status": self.status,
+            "cancel_requested": self.cancel_requested,
+            "urls": len(self.data.get("urls") or []) if isinstance(self.data.get("urls"), list) else None,
+            "results_sent": getattr(self.crawler, "results_sent", None),
+            "deadline_s": self.deadline_s or None,
+            "queued_s": round((self.started_at or self.finished_at or now) - self.enqueued_at, 3),
+            "running_s": round((self.finished_at or now) - self.started_at, 3) if self.started_at else None,
+        }
+
+
+class JobScheduler:
+    """
+    Bounded job queue running at most `workers` jobs at once as coroutines on
+    the node runtime's loop.
+
+    `submit()` never blocks: when the queue is full it raises QueueFull so the
+    route can answer 429 with a Retry-After instead of starting more work.
+    After `shutdown()` it raises ShuttingDown.
+
+    Every job gets an ID and an optional total time budget
+    (`options.deadline_s`, counted from submission). A job that runs past it
+    or is cancelled is stopped, which closes its browser context, gets a
+    final is_last result with status_code 504 / 499 and frees its slot.
+    """
+
+    def __init__(self, workers=WORKER_SLOTS, max_queue=QUEUE_MAX_SIZE, history=JOB_HISTORY):
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self._pending = deque()  # submitted jobs waiting for a slot, oldest first
+        self._jobs = OrderedDict()  # job id -> _Job, queued, running and recently finished
+        self._history = history
+        self._slots = None  # asyncio.Semaphore, created on the runtime loop
+        self._stats_lock = threading.Lock()
+        self._running = 0
+        self._waits = deque(maxlen=100)      # seconds spent queued, recent jobs
+        self._durations = deque(maxlen=100)  # seconds spent running, recent jobs
+        self.closing = False
+
+    def submit(self, crawler, data, on_done=None):
+        """Queue a job; returns its ID. `on_done(status)` runs once the job finished."""
+        options = data.get("options") or {}
+        deadline_s = float(options.get("deadline_s") or DEFAULT_DEADLINE_S)
+        with self._stats_lock:
+            if self.closing:
+                raise ShuttingDown()
+            if len(self._pending) >= self.max_queue:
+                raise QueueFull()
+            job = _Job(crawler, data, deadline_s, on_done)
+            crawler.job_id = job.id
+            self._pending.append(job)
+            self._remember(job)
+        runtime.submit(self._run(job))
+        return job.id
+
+    def _remember(self, job):
+        self._jobs[job.id] = job
+        self._jobs.move_to_end(job.id)
+        finished = [job_id for job_id, j in self._jobs.items() if j.finished_at is not None]
+        for job_id in finished[:max(0, len(self._jobs) - self._history)]:
+            del self._jobs[job_id]
+
+    def _finish(self, job, status):
+        with self._stats_lock:
+            job.status = status
+            job.finished_at = time.monotonic()
+        if job.on_done is not None:
+            try:
+                job.on_done(status)
+            except Exception as e:
+                print(f"❌ Job completion hook failed: {e}")
+
+    async def _stop_result(self, job, status):
+        """Final is_last result for a job stopped by its deadline or a cancel."""
+        self._finish(job, status)
+        JOBS.labels(job.data.get("type") or "unknown", status).inc()
+        if getattr(job.crawler, "sent_last", False):
+            return  # the job had already sent its own last result
+        error = (
+            f"Job exceeded its deadline of {job.deadline_s:g}s"
+            if status == "timeout" else "Job cancelled"
+        )
+        await job.crawler.send({
+            "type": job.data.get("type"),
+            "original_url": job.data.get("urls"),
+            "final_url": '',
+            "error": error,
+            "status": status,
+            "meta": job.data.get("meta"),
+            "is_last": True,
+            "status_code": 504 if status == "timeout" else 499
+        })
+
+    async def _run(self, job):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        async with self._slots:
+            started_at = time.monotonic()
+            with self._stats_lock:
+                if job not in self._pending:
+                    return  # cancelled or handed back while queued
+                self._pending.remove(job)
+                self._running += 1
+                self._waits.append(started_at - job.enqueued_at)
+                job.status = "running"
+                job.started_at = started_at
+            try:
+                remaining = job.deadline_s - (started_at - job.enqueued_at) if job.deadline_s else None
+                if remaining is not None and remaining <= 0:
+                    await self._stop_result(job, "timeout")
+                    return
+                job.task = asyncio.ensure_future(job.crawler.crawl(job.data))
+                await asyncio.wait_for(job.task, remaining)
+                self._finish(job, "done")
+            except asyncio.TimeoutError:
+                await self._stop_result(job, "timeout")
+            except asyncio.CancelledError:
+                if not job.cancel_requested:
+                    raise
+                await self._stop_result(job, "cancelled")
+            except Exception as e:
+                self._finish(job, "failed")
+                record_error(getattr(job.crawler, "crawler_type", None), e)
+                print(f"❌ Crawl job failed: {e}")
+            finally:
+                with self._stats_lock:
+                    self._running -= 1
+                    self._durations.append(time.monotonic() - started_at)
+
+    def get(self, job_id):
+        with self._stats_lock:
+            job = self._jobs.get(job_id)
+            return job.info() if job is not None else None
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job. Returns its info, or None when the
+        ID is unknown; jobs that already finished are left as they are.
+        """
+        with self._stats_lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.finished_at is not None or job.cancel_requested:
+                return job.info()
+            job.cancel_requested = True
+            queued = job in self._pending
+            if queued:
+                self._pending.remove(job)
+
+        if queued:
+            runtime.submit(self._stop_result(job, "cancelled")).result()
+        else:
+            # Running: the job task is created on the loop right after the
+            # job leaves the queue, so cancel from the loop as well
+            runtime.loop.call_soon_threadsafe(self._cancel_task, job)
+        return self.get(job_id)
+
+    def _cancel_task(self, job):
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+
+    def shutdown(self, grace):
+        """
+        Stop taking jobs, take back every job still queued and wait up to
+        `grace` seconds for running ones. Returns (queued jobs as
+        (crawler, data) pairs, jobs still running); jobs with an `on_done`
+        hook get it called with "handed_back" instead.
+        """
+        with self._stats_lock:
+            self.closing = True
+            queued = list(self._pending)
+            self._pending.clear()
+
+        handed_back = []
+        for job in queued:
+            self._finish(job, "handed_back")
+            if job.on_done is None:
+                handed_back.append((job.crawler, job.data))
+
+        deadline = time.monotonic() + grace
+        while time.monotonic() < deadline:
+            with self._stats_lock:
+                if self._running == 0:
+                    break
+            time.sleep(0.1)
+
+        with self._stats_lock:
+            return handed_back, self._running
+
+    def free_capacity(self):
+        """Jobs that could start right now without queueing."""
+        with self._stats_lock:
+            return max(0, self.workers - self._running - len(self._pending))
+
+    def retry_after(self):
+        """Rough number of seconds until a queue slot frees up."""
+        with self._stats_lock:
+            if not self._durations:
+                return RETRY_AFTER_SECONDS
+            avg_duration = sum(self._durations) / len(self._durations)
+        return max(1, math.ceil(avg_duration / self.workers))
+
+    def stats(self):
+        with self._stats_lock:
+            waits = list(self._waits)
+            running = self._running
+            queued = len(self._pending)
+        return {
+            "queued": queued,
+            "max_queue": self.max_queue,
+            "running": running,
+            "workers": self.workers,
+            "free_slots": max(0, self.workers - running),
+            "avg_wait_s": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "max_wait_s": round(max(waits), 3) if waits else 0.0,
+        }
+
+
+scheduler = JobScheduler()
@@ -0,0 +1,115 @@
+import asyncio
+
+from config import SCROLL_STEP_TIMEOUT, SCROLL_IDLE_ROUNDS, SCROLL_BUDGET
+
+_STATE_JS = """
+(itemSelector) => {
+    const root = document.scrollingElement || document.documentElement || document.body;
+    let count = 0;
+    if (itemSelector) {
+        try { count = document.querySelectorAll(itemSelector).length; } catch (e) {}
+    }
+    return {height: root.scrollHeight, count};
+}
+"""
+
+# Jumps to the bottom, then resolves as soon as the document grows or the
+# watched item count goes up, or after `timeoutMs`. A sentinel observed with
+# an IntersectionObserver at the end of the body re-checks whenever it comes
+# back into view, which covers loaders that only react to visibility.
+_SCROLL_AND_WAIT_JS = """
+([prevHeight, prevCount, itemSelector, timeoutMs]) => new Promise(resolve => {
+    const root = document.scrollingElement || document.documentElement || document.body;
+    const state = () => {
+        let count = 0;
+        if (itemSelector) {
+            try { count = document.querySelectorAll(itemSelector).length; } catch (e) {}
+        }
+        return {height: root.scrollHeight, count};
+    };
+
+    const sentinel = document.createElement('div');
+    sentinel.style.cssText = 'width:1px;height:0;';  // must not change scrollHeight
+    document.body.appendChild(sentinel);
+
+    let finished = false;
+    const finish = (grown) => {
+        if (finished) return;
+        finished = true;
+        mutations.disconnect();
+        visibility.disconnect();
+        clearTimeout(timer);
+        sentinel.remove();
+        resolve({...state(), grown});
+    };
+    const check = () => {
+        const now = state();
+        if (now.height > prevHeight || now.count > prevCount) finish(true);
+    };
+
+    const mutations = new MutationObserver(check);
+    mutations.observe(document.body, {childList: true, subtree: true});
+    const visibility = new IntersectionObserver(entries => {
+        if (entries.some(e => e.isIntersecting)) {
+            check();
+            window.scrollTo(0, root.scrollHeight);
+        }
+    });
+    visibility.observe(sentinel);
+    const timer = setTimeout(() => finish(false), timeoutMs);
+
+    window.scrollTo(0, root.scrollHeight);
+    check();
+})
+"""
+
+
+async def auto_scroll(page, options):
+    """
+    Scroll an infinite-scroll page until nothing new loads.
+
+    Each round jumps to the bottom and waits only until `scrollHeight` (or the
+    number of `options.scroll_item_selector` matches) grows, at most
+    `options.scroll_timeout` seconds. Scrolling stops after
+    `options.max_scrolls` rounds, after `options.scroll_idle_rounds` rounds in
+    a row without growth, once `options.scroll_target_items` items are on the
+    page, or when the `options.scroll_budget` seconds for the page run out.
+    Returns the number of rounds that loaded new content.
+    """
+    max_scrolls = int(options.get("max_scrolls", 5))
+    step_timeout_ms = int(float(options.get("scroll_timeout", SCROLL_STEP_TIMEOUT)) * 1000)
+    idle_rounds = max(1, int(options.get("scroll_idle_rounds", SCROLL_IDLE_ROUNDS)))
+    budget = float(options.get("scroll_budget", SCROLL_BUDGET))
+    item_selector = options.get("scroll_item_selector")
+    target_items = int(options.get("scroll_target_items") or 0)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + budget
+
+    state = await page.evaluate(_STATE_JS, item_selector)
+    grown_rounds = 0
+    idle = 0
+
+    for _ in range(max_scrolls):
+        if target_items and item_selector and state["count"] >= target_items:
+            break
+        remaining_ms = int((deadline - loop.time()) * 1000)
+        if remaining_ms <= 0:
+            break
+
+        # Some feeds only listen for wheel events, not scroll position
+        await page.mouse.wheel(0, 2000)
+        state = await page.evaluate(
+            _SCROLL_AND_WAIT_JS,
+            [state["height"], state["count"], item_selector, min(step_timeout_ms, remaining_ms)]
+        )
+
+        if state["grown"]:
+            grown_rounds += 1
+            idle = 0
+        else:
+            idle += 1
+            if idle >= idle_rounds:
+                break
+
+    return grown_rounds
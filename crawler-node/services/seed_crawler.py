@@ -1,21 +1,25 @@
 import asyncio
-from playwright.async_api import async_playwright
+from config import MAX_JOB_CONCURRENCY
 from services.base_crawler import BaseCrawler
-from utils.sender import send_result_to_laravel
-from config import DEBUG_MODE
+from services.frontier import Frontier, FollowRules, canonicalize_url
+from services.readiness import HostPoliteness
+from utils.link_filter import LinkFilter
+from utils.metrics import record_error
+
+# Deduplicated in the page so repeated links never cross CDP
+_UNIQUE_HREFS_JS = "elements => [...new Set(elements.map(e => e.href))]"
 
 
 class SeedCrawler(BaseCrawler):
-    def crawl(self, config):
-        return asyncio.run(self._crawl_seed(config))
+    crawler_type = "seed"
 
-    async def _crawl_seed(self, config):
+    async def crawl(self, config):
         try:
             urls = config.get("urls")
             meta = config.get("meta")
 
             if not urls or not isinstance(urls, list):
-                send_result_to_laravel({
+                await self.send({
                     "type": "seed",
                     "original_url": urls,
                     "error": "Missing or invalid urls (must be an array)",
@@ -26,7 +30,7 @@ class SeedCrawler(BaseCrawler):
                 return '', 400
 
             if not meta:
-                send_result_to_laravel({
+                await self.send({
                     "type": "seed",
                     "original_url": urls,
                     "error": "Missing meta",
@@ -38,9 +42,11 @@ class SeedCrawler(BaseCrawler):
 
             options = config.get("options", {})
             delay = int(options.get("crawl_delay", 1))
+            self.politeness = HostPoliteness(delay)
             headers = options.get("headers", {})
             selector = options.get("selector")
-            include_patterns = options.get("link_filter_rules", [])
+            # Compiled once per job, applied to every page
+            link_filter = LinkFilter(options.get("link_filter_rules", []))
 
             if "User-Agent" not in headers:
                 headers["User-Agent"] = (
@@ -49,60 +55,181 @@ class SeedCrawler(BaseCrawler):
                     "Chrome/119.0.0.0 Safari/537.36"
                 )
 
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
-                    headless=not DEBUG_MODE,
-                    slow_mo=200 if DEBUG_MODE else 0
+            async def collect_links(page, url):
+                await self.goto(page, url, options, [selector] if selector and selector != 'null' else None, timeout=15000)
+                
+                if selector and selector != 'null':
+                    return await page.eval_on_selector_all(
+                        f"{selector} a[href]",
+                        _UNIQUE_HREFS_JS
+                    )
+                return await page.eval_on_selector_all(
+                    "a[href]",
+                    _UNIQUE_HREFS_JS
                 )
-                context = await browser.new_context(extra_http_headers=headers)
-                page = await context.new_page()
 
+            async def handle(page, url):
+                links = await collect_links(page, url)
+                matched_links = self._apply_filters(links, link_filter)
+                    
+                return {
+                    "type": "seed",
+                    "original_url": url,
+                    "final_url": page.url,
+                    "content": matched_links,
+                    "meta": meta,
+                    "status_code": 200
+                }
 
-                for index, url in enumerate(urls):
-                    try:
-                        await page.goto(url, timeout=15000)
-                        await page.wait_for_load_state("networkidle")
-                        await asyncio.sleep(delay)
-                        
-                        if selector and selector != 'null':
-                            links = await page.eval_on_selector_all(
-                                f"{selector} a[href]",
-                                "elements => elements.map(e => e.href)"
-                            )
-                        else:
-                            links = await page.eval_on_selector_all(
-                                "a[href]",
-                                "elements => elements.map(e => e.href)"
-                            )    
-                            
-                        matched_links = self._apply_filters(links, include_patterns)
-                            
-                        send_result_to_laravel({
-                            "type": "seed",
-                            "original_url": url,
-                            "final_url": page.url,
-                            "content": matched_links,
-                            "meta": meta,
-                            "is_last": index == len(urls) - 1,
-                            "status_code": 200
-                        })
-
-                    except Exception as e:
-                        send_result_to_laravel({
-                            "type": "seed",
-                            "original_url": url,
-                            "error": str(e),
-                            "meta": meta,
-                            "is_last": index == len(urls) - 1,
-                            "status_code": 500
-                        })
-
-                await browser.close()
+            async with self.new_context(headers, options) as context:
+                if int(options.get("max_depth", 0)) > 0:
+                    await self._crawl_frontier(context, urls, collect_links, link_filter, meta, options)
+                else:
+                    await self.crawl_pages(context, urls, handle, meta, options)
 
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
-    def _apply_filters(self, links, include_substrings):
-        if not include_substrings:
-            return links
-        return [link for link in links if any(sub in link for sub in include_substrings)]
+    async def _crawl_frontier(self, context, seeds, collect_links, link_filter, meta, options):
+        """
+        Discover links breadth-first from `seeds` down to `options.max_depth`,
+        crawling at most `options.max_pages` pages, `options.concurrency` at
+        a time. Links are followed when they pass `same_domain` (default on)
+        and, if given, `follow_regex` / `follow_glob`.
+
+        Every crawled page sends its newly discovered links that pass
+        `link_filter_rules` as soon as it finishes, with its `depth`; links
+        are canonicalised and reported once per job. Seeds keep the exact
+        form they were given in; a seed that is not a valid http(s) url, a
+        duplicate of an earlier one or beyond `max_pages` gets an error result
+        instead. The last result sent carries is_last, also when the crawl
+        fails part way.
+        """
+        frontier = Frontier(int(options.get("max_depth", 0)), int(options.get("max_pages", 0)))
+        rules = FollowRules(
+            seeds,
+            same_domain=options.get("same_domain", True),
+            regex=options.get("follow_regex"),
+            glob=options.get("follow_glob"),
+        )
+        rejected = []
+        for seed in seeds:
+            if canonicalize_url(seed) is None:
+                rejected.append((seed, "Invalid seed url"))
+            elif frontier.discover(seed) is None:
+                rejected.append((seed, "Duplicate seed url"))
+            elif not frontier.schedule(seed, 0):
+                rejected.append((seed, "Seed url beyond max_pages"))
+
+        concurrency = max(1, min(int(options.get("concurrency", 1)), MAX_JOB_CONCURRENCY))
+        in_flight = 0
+        wakeup = asyncio.Event()
+        held = None
+        crashed_pages = set()
+
+        async def emit(payload):
+            # Hold one result back so the final one can be marked is_last
+            nonlocal held
+            previous, held = held, payload
+            if previous is not None:
+                previous["is_last"] = False
+                await self.send(previous)
+
+        async def visit(current_page, url, depth):
+            try:
+                page = await current_page()
+                links = await collect_links(page, url)
+                discovered = []
+                for link in links:
+                    link = frontier.discover(link)
+                    if link is None:
+                        continue
+                    if rules.allows(link):
+                        frontier.schedule(link, depth + 1)
+                    discovered.append(link)
+
+                await emit({
+                    "type": "seed",
+                    "original_url": url,
+                    "final_url": page.url,
+                    "content": self._apply_filters(discovered, link_filter),
+                    "depth": depth,
+                    "meta": meta,
+                    "status_code": 200
+                })
+            except Exception as page_error:
+                record_error(self.crawler_type, page_error)
+                await emit({
+                    "type": "seed",
+                    "original_url": url,
+                    "error": str(page_error),
+                    "depth": depth,
+                    "meta": meta,
+                    "status_code": 500
+                })
+
+        async def worker():
+            nonlocal in_flight
+            page = None
+
+            async def current_page():
+                # A crashed or closed page is replaced instead of failing every later url
+                nonlocal page
+                if page is not None and (page.is_closed() or page in crashed_pages):
+                    await self._discard_page(page)
+                    page = None
+                if page is None:
+                    page = await context.new_page()
+                    page.on("crash", crashed_pages.add)
+                return page
+
+            try:
+                while True:
+                    item = frontier.pop()
+                    if item is None:
+                        if in_flight == 0:
+                            wakeup.set()
+                            return
+                        # Others are still crawling and may add to the frontier
+                        wakeup.clear()
+                        await wakeup.wait()
+                        continue
+
+                    in_flight += 1
+                    try:
+                        await visit(current_page, *item)
+                    finally:
+                        in_flight -= 1
+                        wakeup.set()
+            finally:
+                if page is not None:
+                    await self._discard_page(page)
+
+        try:
+            for seed, error in rejected:
+                await emit({
+                    "type": "seed",
+                    "original_url": seed,
+                    "error": error,
+                    "depth": 0,
+                    "meta": meta,
+                    "status_code": 400
+                })
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        finally:
+            if held is None:
+                held = {
+                    "type": "seed",
+                    "original_url": seeds,
+                    "error": "No seed url could be crawled",
+                    "meta": meta,
+                    "status_code": 500
+                }
+            held["is_last"] = True
+            await self.send(held)
+
+    def cache_spec(self, options):
+        return {"selector": options.get("selector"), "link_filter_rules": options.get("link_filter_rules", [])}
+
+    def _apply_filters(self, links, link_filter):
+        return link_filter.apply(links)
@@ -0,0 +1,71 @@
+import base64
+import hashlib
+import json
+import os
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from config import SESSION_STORE_DIR, SESSION_STORE_KEY, SESSION_MAX_AGE
+
+
+class SessionStore:
+    """
+    Encrypted on-disk cache of Playwright `storage_state` (cookies and
+    localStorage), keyed by (login_url, username).
+
+    Sessions are encrypted with a key derived from SESSION_STORE_KEY; without
+    that key nothing is cached and every job logs in as before.
+    """
+
+    def __init__(self, directory=SESSION_STORE_DIR, secret=SESSION_STORE_KEY, max_age=SESSION_MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+        self._fernet = None
+        if secret:
+            key = base64.urlsafe_b64encode(hashlib.sha256(secret.encode("utf-8")).digest())
+            self._fernet = Fernet(key)
+
+    @property
+    def enabled(self):
+        return self._fernet is not None
+
+    def _path(self, login_url, username):
+        digest = hashlib.sha256(f"{login_url}\0{username}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.session")
+
+    def load(self, login_url, username):
+        if not self.enabled:
+            return None
+        path = self._path(login_url, username)
+        try:
+            with open(path, "rb") as f:
+                token = f.read()
+            data = self._fernet.decrypt(token, ttl=self.max_age or None)
+            return json.loads(data)
+        except FileNotFoundError:
+            return None
+        except (InvalidToken, ValueError, OSError) as e:
+            # Expired, written with another key, or corrupt: start over
+            print(f"⚠️ Discarding cached session: {e.__class__.__name__}")
+            self.drop(login_url, username)
+            return None
+
+    def save(self, login_url, username, storage_state):
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(login_url, username)
+        token = self._fernet.encrypt(json.dumps(storage_state).encode("utf-8"))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(token)
+        os.replace(tmp_path, path)
+
+    def drop(self, login_url, username):
+        try:
+            os.remove(self._path(login_url, username))
+        except OSError:
+            pass
+
+
+session_store = SessionStore()
@@ -1,21 +1,20 @@
 import asyncio
-from playwright.async_api import async_playwright
+from contextlib import AsyncExitStack
 from services.base_crawler import BaseCrawler
-from utils.sender import send_result_to_laravel
-from config import DEBUG_MODE
+from services.readiness import HostPoliteness
+from utils.extraction import looks_js_rendered
 
 
 class StaticCrawler(BaseCrawler):
-    def crawl(self, config):
-        return asyncio.run(self._crawl_static(config))
+    crawler_type = "static"
 
-    async def _crawl_static(self, config):
+    async def crawl(self, config):
         try:
             urls = config.get("urls")
             meta = config.get("meta")
 
             if not urls or not isinstance(urls, list):
-                send_result_to_laravel({
+                await self.send({
                     "type": "static",
                     "original_url": urls,
                     "error": 'Missing or invalid urls (must be an array)',
@@ -26,7 +25,7 @@ class StaticCrawler(BaseCrawler):
                 return '', 400
 
             if not meta or not isinstance(meta, dict):
-                send_result_to_laravel({
+                await self.send({
                     "type": "static",
                     "original_url": urls,
                     "error": 'Missing or invalid meta (must be an object)',
@@ -38,8 +37,10 @@ class StaticCrawler(BaseCrawler):
 
             options = config.get("options", {})
             delay = int(options.get("crawl_delay", 0))
+            self.politeness = HostPoliteness(delay)
             headers = options.get("headers", {})
             selectors = options.get("selectors", [])  # Must be a list of dicts
+            engine = options.get("engine", "browser")  # browser | http | auto
 
             if "User-Agent" not in headers:
                 headers["User-Agent"] = (
@@ -48,76 +49,61 @@ class StaticCrawler(BaseCrawler):
                     "Chrome/119.0.0.0 Safari/537.36"
                 )
 
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
-                    headless=not DEBUG_MODE,
-                    slow_mo=200 if DEBUG_MODE else 0
-                )
-                context = await browser.new_context(extra_http_headers=headers)
-                page = await context.new_page()
+            async def handle(page, url):
+                await self.goto(page, url, options, selectors, timeout=15000)
+
+                extracted_data = await self.extract_deferred(page, selectors, options)
 
-                for index, url in enumerate(urls):
+                return {
+                    "type": "static",
+                    "original_url": url,
+                    "final_url": page.url,
+                    "content": extracted_data,
+                    "meta": meta,
+                    'status_code': 200
+                }
+
+            if engine not in ("http", "auto"):
+                async with self.new_context(headers, options) as context:
+                    await self.crawl_pages(context, urls, handle, meta, options)
+                return
+
+            async with AsyncExitStack() as stack:
+                # Only start a browser context if a page actually needs one
+                browser_context = None
+                context_lock = asyncio.Lock()
+
+                async def handle_in_browser(url):
+                    nonlocal browser_context
+                    async with context_lock:
+                        if browser_context is None:
+                            browser_context = await stack.enter_async_context(self.new_context(headers, options))
+                    page = await browser_context.new_page()
                     try:
-                        await page.goto(url, timeout=15000)
-                        await page.wait_for_load_state("networkidle")
-                        await asyncio.sleep(delay)
-
-                        extracted_data = {}
-                        for selector_item in selectors:
-                            field = selector_item.get("key")
-                            selector = selector_item.get("selector")
-                            full_html = selector_item.get("full_html", False)
-
-                            if not field or not selector:
-                                continue
-
-                            try:
-                                elements = await page.query_selector_all(selector)
-                                field_contents = []
-
-                                for element in elements:
-                                    try:
-                                        if full_html:
-                                            content = await element.inner_html()
-                                        else:
-                                            raw_text = await element.text_content()
-                                            content = ' '.join([
-                                                t.strip() for t in raw_text.split('\n')
-                                                if t.strip() and t not in ('== %0', '⇔')
-                                            ]) if raw_text else None
-
-                                        if content:
-                                            field_contents.append(content.strip())
-
-                                    except Exception:
-                                        continue
-
-                                extracted_data[field] = field_contents
-
-                            except Exception:
-                                extracted_data[field] = []
-
-                        send_result_to_laravel({
-                            "type": "static",
-                            "original_url": url,
-                            "final_url": page.url,
-                            "content": extracted_data,
-                            "meta": meta,
-                            "is_last": index == len(urls) - 1,
-                            'status_code': 200
-                        })
-
-                    except Exception as page_error:
-                        send_result_to_laravel({
-                            "type": "static",
-                            "original_url": url,
-                            "error": str(page_error),
-                            "meta": meta,
-                            "is_last": index == len(urls) - 1,
-                            'status_code': 500
-                        })
-
-                await browser.close()
+                        return await handle(page, url)
+                    finally:
+                        await page.close()
+
+                async def handle_http(page, url):
+                    response = await self.fetch(url, headers=headers)
+                    self.remember_validators(url, response.headers)
+                    extracted_data = await self.parse_html(url, response.text, selectors, options)
+
+                    if engine == "auto" and (
+                        response.status_code >= 400 or looks_js_rendered(response.text, extracted_data)
+                    ):
+                        return await handle_in_browser(url)
+
+                    return {
+                        "type": "static",
+                        "original_url": url,
+                        "final_url": str(response.url),
+                        "content": extracted_data,
+                        "meta": meta,
+                        'status_code': 200
+                    }
+
+                await self.crawl_pages(None, urls, handle_http, meta, options)
 
         except Exception as main_error:
             return {"status": "error", "message": str(main_error)}
@@ -0,0 +1,125 @@
+"""
+Broker and pull-mode tests against the in-process SQLite backend.
+
+Run from crawler-node/: python -m pytest tests
+"""
+import time
+
+import pytest
+
+from services.broker import DuplicateJob, create_broker
+import services.puller as puller
+from config import BROKER_MAX_DELIVERIES
+
+
+@pytest.fixture
+def broker():
+    return create_broker("sqlite://:memory:")
+
+
+def test_lease_hands_out_jobs_oldest_first(broker):
+    first = broker.push({"type": "static", "urls": ["a"]})
+    second = broker.push({"type": "static", "urls": ["b"]})
+
+    leases = broker.lease("node-1", 1, 60)
+    assert [(job_id, data["urls"], deliveries) for job_id, data, deliveries in leases] == [(first, ["a"], 1)]
+    assert [job_id for job_id, _, _ in broker.lease("node-2", 5, 60)] == [second]
+    assert broker.lease("node-3", 5, 60) == []
+
+
+def test_ack_removes_the_job(broker):
+    job_id = broker.push({"type": "static", "urls": ["a"], "job_id": "job-1"})
+    assert job_id == "job-1"
+    broker.lease("node-1", 1, 60)
+
+    broker.ack(job_id)
+
+    assert broker.get(job_id) is None
+    assert broker.lease("node-1", 1, 0) == []
+
+
+def test_unacked_job_is_redelivered_after_the_visibility_timeout(broker):
+    job_id = broker.push({"type": "static", "urls": ["a"]})
+    broker.lease("node-1", 1, 0.05)
+    assert broker.lease("node-2", 1, 60) == []
+    assert broker.get(job_id)["status"] == "leased"
+
+    time.sleep(0.1)
+
+    assert [(leased_id, deliveries) for leased_id, _, deliveries in broker.lease("node-2", 1, 60)] == [(job_id, 2)]
+    assert broker.get(job_id)["node"] == "node-2"
+
+
+def test_extend_keeps_the_job_leased(broker):
+    job_id = broker.push({"type": "static", "urls": ["a"]})
+    broker.lease("node-1", 1, 0.05)
+    broker.extend(job_id, 60)
+
+    time.sleep(0.1)
+
+    assert broker.lease("node-2", 1, 60) == []
+
+
+def test_nack_releases_the_job_at_once(broker):
+    job_id = broker.push({"type": "static", "urls": ["a"]})
+    broker.lease("node-1", 1, 60)
+
+    broker.nack(job_id)
+
+    assert [leased_id for leased_id, _, _ in broker.lease("node-2", 1, 60)] == [job_id]
+
+
+def test_duplicate_job_id_is_rejected(broker):
+    broker.push({"type": "static", "urls": ["a"], "job_id": "job-1"})
+
+    with pytest.raises(DuplicateJob):
+        broker.push({"type": "static", "urls": ["b"], "job_id": "job-1"})
+    assert broker.lease("node-1", 5, 60)[0][1]["urls"] == ["a"]
+
+
+def test_cancel_removes_a_waiting_job_and_flags_a_leased_one(broker):
+    waiting = broker.push({"type": "static", "urls": ["a"]})
+    assert broker.cancel(waiting) == ("removed", {"type": "static", "urls": ["a"], "job_id": waiting})
+    assert broker.get(waiting) is None
+
+    leased = broker.push({"type": "static", "urls": ["b"]})
+    broker.lease("node-1", 1, 60)
+    assert broker.cancel(leased) == ("requested", None)
+    assert broker.cancelled([leased, "unknown"]) == {leased}
+    assert broker.cancel("unknown") is None
+
+
+@pytest.fixture
+def job_puller(broker, monkeypatch):
+    sent = []
+    monkeypatch.setattr(puller, "send_result_to_laravel", sent.append)
+    job_puller = puller.JobPuller(broker=broker)
+    job_puller.sent = sent
+    return job_puller
+
+
+def test_job_past_max_deliveries_is_dropped_with_an_error_result(broker, job_puller):
+    job_id = broker.push({"type": "static", "urls": ["a"], "meta": {"id": 1}})
+    for _ in range(BROKER_MAX_DELIVERIES):
+        broker.lease("node-1", 1, 0)
+    [(leased_id, data, deliveries)] = broker.lease("node-1", 1, 60)
+    assert deliveries == BROKER_MAX_DELIVERIES + 1
+
+    job_puller._start_job(leased_id, data, deliveries)
+
+    assert broker.get(job_id) is None
+    [result] = job_puller.sent
+    assert result["job_id"] == job_id
+    assert result["is_last"] is True
+    assert result["status_code"] == 500
+    assert result["meta"] == {"id": 1}
+
+
+def test_cancel_of_a_job_waiting_in_the_broker_sends_its_last_result(broker, job_puller):
+    job_id = broker.push({"type": "static", "urls": ["a"], "meta": {}})
+
+    assert job_puller.cancel(job_id)["status"] == "cancelled"
+
+    assert broker.get(job_id) is None
+    [result] = job_puller.sent
+    assert (result["job_id"], result["status_code"], result["is_last"]) == (job_id, 499, True)
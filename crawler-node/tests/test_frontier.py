@@ -0,0 +1,48 @@
+"""
+canonicalize_url tests: the form links are deduplicated in by the seed
+crawler's frontier.
+
+Run from crawler-node/: python -m pytest tests
+"""
+import pytest
+
+from services.frontier import canonicalize_url
+
+
+@pytest.mark.parametrize("url, canonical", [
+    ("HTTP://Example.COM/Path", "http://example.com/Path"),
+    ("https://example.com", "https://example.com/"),
+    ("https://example.com:443/a", "https://example.com/a"),
+    ("http://example.com:80/a", "http://example.com/a"),
+    ("http://example.com:8080/a", "http://example.com:8080/a"),
+    ("https://example.com/a#section", "https://example.com/a"),
+    ("https://example.com/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+    ("https://example.com/a?utm_source=x&id=1&gclid=y&fbclid=z", "https://example.com/a?id=1"),
+    ("https://example.com/a?empty=", "https://example.com/a?empty="),
+    ("  https://example.com/a  ", "https://example.com/a"),
+])
+def test_canonical_form(url, canonical):
+    assert canonicalize_url(url) == canonical
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://example.com/file",
+    "mailto:someone@example.com",
+    "javascript:void(0)",
+    "/relative/path",
+    "https://",
+    "http://example.com:notaport/",
+    None,
+    42,
+])
+def test_anything_but_http_urls_is_rejected(url):
+    assert canonicalize_url(url) is None
+
+
+def test_equivalent_urls_share_one_canonical_form():
+    urls = [
+        "https://Example.com:443/a?b=2&a=1#top",
+        "https://example.com/a?a=1&b=2&utm_campaign=spring",
+    ]
+
+    assert len({canonicalize_url(url) for url in urls}) == 1
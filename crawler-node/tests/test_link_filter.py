@@ -0,0 +1,74 @@
+"""
+LinkFilter tests: plain string rules keep the old substring filter's
+behaviour, dict rules add exclude, regex/glob and host/path scopes.
+
+Run from crawler-node/: python -m pytest tests
+"""
+import pytest
+
+import utils.link_filter as link_filter
+from utils.link_filter import LinkFilter
+
+LINKS = [
+    "https://example.com/blog/post-1",
+    "https://example.com/shop/item?id=2",
+    "https://news.example.com/blog/today",
+    "https://other.org/blog/post-1.pdf",
+    "https://other.org/about",
+]
+
+
+def substring_filter(links, include_substrings):
+    # The filter SeedCrawler used before link_filter_rules were compiled
+    if not include_substrings:
+        return links
+    return [link for link in links if any(sub in link for sub in include_substrings)]
+
+
+@pytest.fixture(params=["default", "regex"])
+def matcher(request, monkeypatch):
+    # Every test also runs without pyahocorasick, on the combined regex
+    if request.param == "regex":
+        monkeypatch.setattr(link_filter, "ahocorasick", None)
+
+
+@pytest.mark.parametrize("rules", [[], ["blog"], ["blog", "shop"], ["item?id=", "x.y"], ["nowhere"]])
+def test_plain_strings_match_the_old_substring_filter(matcher, rules):
+    assert LinkFilter(rules).apply(LINKS) == substring_filter(LINKS, rules)
+
+
+def test_invalid_rules_are_ignored(matcher):
+    assert LinkFilter([None, 3, {}, {"pattern": ""}]).apply(LINKS) == LINKS
+
+
+def test_exclude_wins_over_include(matcher):
+    rules = ["blog", {"pattern": ".pdf", "exclude": True}]
+
+    assert LinkFilter(rules).apply(LINKS) == LINKS[0:1] + LINKS[2:3]
+
+
+def test_exclude_only_keeps_everything_else(matcher):
+    assert LinkFilter([{"pattern": "other.org", "exclude": True}]).apply(LINKS) == LINKS[:3]
+
+
+def test_regex_and_glob_rules(matcher):
+    assert LinkFilter([{"pattern": r"post-\d+$", "type": "regex"}]).apply(LINKS) == LINKS[:1]
+    assert LinkFilter([{"pattern": "*.pdf", "type": "glob"}]).apply(LINKS) == LINKS[3:4]
+
+
+def test_host_scope_covers_subdomains_only_for_that_rule(matcher):
+    rules = [{"pattern": "blog", "host": "Example.com"}, "about"]
+
+    assert LinkFilter(rules).apply(LINKS) == [LINKS[0], LINKS[2], LINKS[4]]
+
+
+def test_path_prefix_scope(matcher):
+    rules = [{"pattern": "post", "path_prefix": "/blog"}, {"pattern": "id=", "path_prefix": "/blog"}]
+
+    assert LinkFilter(rules).apply(LINKS) == [LINKS[0], LINKS[3]]
+
+
+def test_scoped_exclude_leaves_other_hosts_alone(matcher):
+    rules = [{"pattern": "blog", "exclude": True, "host": "other.org"}]
+
+    assert LinkFilter(rules).apply(LINKS) == [LINKS[0], LINKS[1], LINKS[2], LINKS[4]]
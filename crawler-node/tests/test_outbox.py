@@ -0,0 +1,93 @@
+"""
+Outbox ordering tests: rows of one job go out in order, and a row that is
+backing off only holds up its own job.
+
+Run from crawler-node/: python -m pytest tests
+"""
+import pytest
+
+from utils.outbox import Outbox
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(str(tmp_path / "outbox.db"))
+
+
+def bodies(batch):
+    return [body for _, _, _, body, _ in batch]
+
+
+def make_due(outbox):
+    outbox._db.execute("UPDATE results SET next_attempt = 0")
+
+
+def test_head_hands_out_rows_in_insertion_order(outbox):
+    for body in (b"a1", b"b1", b"a2"):
+        outbox.append(body, body[:1].decode())
+
+    assert bodies(outbox.head(10, 1024)) == [b"a1", b"b1", b"a2"]
+    assert bodies(outbox.head(2, 1024)) == [b"a1", b"b1"]
+
+
+def test_head_stops_at_max_bytes_but_always_returns_one_row(outbox):
+    outbox.append(b"x" * 10, "a")
+    outbox.append(b"y" * 10, "b")
+
+    assert bodies(outbox.head(10, 15)) == [b"x" * 10]
+    assert bodies(outbox.head(10, 5)) == [b"x" * 10]
+
+
+def test_backing_off_row_holds_back_only_its_own_job(outbox):
+    first = outbox.append(b"a1", "a")
+    outbox.append(b"a2", "a")
+    outbox.append(b"b1", "b")
+    outbox.append(b"n1")
+
+    outbox.retry([first], 0)
+
+    batch = outbox.head(10, 1024)
+    assert bodies(batch) == [b"b1", b"n1"]
+
+    outbox.ack([row_id for row_id, _, _, _, _ in batch])
+    assert outbox.head(10, 1024) == []
+    assert outbox.next_attempt_in() > 0
+
+
+def test_retried_row_is_sent_alone_and_still_ahead_of_its_job(outbox):
+    first = outbox.append(b"a1", "a")
+    outbox.append(b"a2", "a")
+    outbox.append(b"b1", "b")
+    outbox.retry([first], 0)
+    make_due(outbox)
+
+    [(row_id, attempts, _, body, job)] = outbox.head(10, 1024)
+    assert (row_id, attempts, body, job) == (first, 1, b"a1", "a")
+
+
+def test_retried_row_behind_fresh_rows_waits_for_its_own_batch(outbox):
+    outbox.append(b"b1", "b")
+    first = outbox.append(b"a1", "a")
+    outbox.append(b"a2", "a")
+    outbox.append(b"b2", "b")
+    outbox.retry([first], 0)
+    make_due(outbox)
+
+    assert bodies(outbox.head(10, 1024)) == [b"b1", b"b2"]
+    outbox.ack([row_id for row_id, _, _, _, _ in outbox.head(10, 1024)])
+    assert bodies(outbox.head(10, 1024)) == [b"a1"]
+
+
+def test_ack_and_bury_release_the_next_row_of_the_job(outbox):
+    first = outbox.append(b"a1", "a")
+    second = outbox.append(b"a2", "a")
+    outbox.append(b"a3", "a")
+    outbox.retry([first], 0)
+    assert outbox.head(10, 1024) == []
+
+    outbox.bury([first])
+    assert bodies(outbox.head(10, 1024)) == [b"a2", b"a3"]
+
+    outbox.ack([second])
+    assert bodies(outbox.head(10, 1024)) == [b"a3"]
+    assert outbox.counts() == (1, 1)
@@ -0,0 +1,32 @@
+"""
+infer_page_template tests: learning a page URL template from the links
+to pages 2 and 3.
+
+Run from crawler-node/: python -m pytest tests
+"""
+import pytest
+
+from services.pagination import infer_page_template, page_url
+
+
+@pytest.mark.parametrize("second, third, inferred", [
+    ("https://example.com/list?page=2", "https://example.com/list?page=3", ("https://example.com/list?page={page}", 2)),
+    ("https://example.com/list/page/2/", "https://example.com/list/page/3/", ("https://example.com/list/page/{page}", 2)),
+    ("https://example.com/2024/list?p=9", "https://example.com/2024/list?p=10", ("https://example.com/2024/list?p={page}", 9)),
+    ("https://example.com/list?page=2#top", "https://example.com/list?page=3", ("https://example.com/list?page={page}", 2)),
+])
+def test_template_is_inferred_from_the_counter(second, third, inferred):
+    assert infer_page_template(second, third) == inferred
+    template, number = inferred
+    assert page_url(template, number + 1) == third.split("#")[0].rstrip("/")
+
+
+@pytest.mark.parametrize("second, third", [
+    ("https://example.com/list?start=20", "https://example.com/list?start=40"),
+    ("https://example.com/a", "https://example.com/b"),
+    ("https://example.com/list?page=2", "https://other.org/list?page=3"),
+    (None, "https://example.com/list?page=3"),
+    ("https://example.com/list?page=2", ""),
+])
+def test_no_template_without_a_single_page_counter(second, third):
+    assert infer_page_template(second, third) is None
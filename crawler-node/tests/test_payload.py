@@ -0,0 +1,84 @@
+"""
+Result encoding tests: oversized results are split into chunks that
+repeat the envelope and reassemble to the original content.
+
+Run from crawler-node/: python -m pytest tests
+"""
+import orjson
+
+from utils.payload import encode_result, _split_content
+
+
+def decode_all(bodies):
+    return [orjson.loads(body) for body in bodies]
+
+
+def merge(chunks):
+    content = {}
+    for chunk in chunks:
+        for key, values in chunk["content"].items():
+            if isinstance(values, list):
+                content.setdefault(key, []).extend(values)
+            else:
+                content[key] = values
+    return content
+
+
+def big_result(is_last=True):
+    return {
+        "type": "static",
+        "original_url": "https://example.com/",
+        "meta": {"id": 1},
+        "content": {"a": ["x" * 50] * 10, "b": ["y" * 50] * 10, "title": "t"},
+        "status_code": 200,
+        "is_last": is_last,
+    }
+
+
+def test_small_result_is_one_unchanged_body():
+    payload = {"type": "static", "content": {"a": ["x"]}, "is_last": True}
+
+    assert decode_all(encode_result(payload, 1024)) == [payload]
+
+
+def test_large_result_is_split_into_numbered_chunks():
+    payload = big_result()
+
+    chunks = decode_all(encode_result(payload, 400))
+
+    assert len(chunks) > 1
+    assert [chunk["chunk_index"] for chunk in chunks] == list(range(len(chunks)))
+    assert {chunk["chunk_count"] for chunk in chunks} == {len(chunks)}
+    for chunk in chunks:
+        assert (chunk["original_url"], chunk["meta"], chunk["status_code"]) == ("https://example.com/", {"id": 1}, 200)
+    assert merge(chunks) == payload["content"]
+
+
+def test_first_chunk_has_every_key():
+    chunks = decode_all(encode_result(big_result(), 400))
+
+    assert set(chunks[0]["content"]) == {"a", "b", "title"}
+    assert all("title" not in chunk["content"] for chunk in chunks[1:])
+
+
+def test_only_the_final_chunk_carries_is_last():
+    chunks = decode_all(encode_result(big_result(), 400))
+    assert [chunk["is_last"] for chunk in chunks] == [False] * (len(chunks) - 1) + [True]
+
+    chunks = decode_all(encode_result(big_result(is_last=False), 400))
+    assert not any(chunk["is_last"] for chunk in chunks)
+
+
+def test_list_content_is_split_in_order():
+    payload = {"type": "seed", "content": [f"https://example.com/{i}" for i in range(50)], "is_last": True}
+
+    chunks = decode_all(encode_result(payload, 300))
+
+    assert len(chunks) > 1
+    assert [link for chunk in chunks for link in chunk["content"]] == payload["content"]
+
+
+def test_value_larger_than_the_budget_gets_a_part_of_its_own():
+    parts = _split_content(["small", "z" * 100, "small"], 50)
+
+    assert parts == [["small"], ["z" * 100], ["small"]]
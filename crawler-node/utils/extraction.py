@@ -0,0 +1,210 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from html import escape
+
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+
+from config import EXTRACT_WORKERS
+
+# Lines dropped by the text normaliser
+IGNORED_LINES = ('== %0', '⇔')
+
+# Evaluates the whole selectors spec in one round-trip. Like Playwright's CSS
+# engine it also matches inside open shadow roots. Fields whose selector is
+# not plain CSS (Playwright's text=, xpath=, ...) come back in `fallback`.
+_EXTRACT_JS = """
+(spec) => {
+    const ignored = new Set(spec.ignored);
+    const content = {};
+    const fallback = [];
+    const roots = [document];
+    for (let i = 0; i < roots.length; i++) {
+        for (const element of roots[i].querySelectorAll('*')) {
+            if (element.shadowRoot) {
+                roots.push(element.shadowRoot);
+            }
+        }
+    }
+    for (const item of spec.selectors) {
+        let elements;
+        try {
+            elements = roots.flatMap(root => [...root.querySelectorAll(item.selector)]);
+        } catch (e) {
+            fallback.push(item.key);
+            continue;
+        }
+        const values = [];
+        for (const element of elements) {
+            let value;
+            if (item.full_html) {
+                value = element.innerHTML;
+            } else {
+                const raw = element.textContent;
+                value = raw ? raw.split('\\n')
+                    .filter(t => t.trim() && !ignored.has(t))
+                    .map(t => t.trim())
+                    .join(' ') : null;
+            }
+            if (value) {
+                values.push(value.trim());
+            }
+        }
+        content[item.key] = values;
+    }
+    return {content, fallback};
+}
+"""
+
+
+def normalize_text(raw_text):
+    if not raw_text:
+        return None
+    return ' '.join([
+        t.strip() for t in raw_text.split('\n')
+        if t.strip() and t not in IGNORED_LINES
+    ])
+
+
+@lru_cache(maxsize=256)
+def _compile(selector):
+    return CSSSelector(selector)
+
+
+def _inner_html(element):
+    parts = [escape(element.text, quote=False)] if element.text else []
+    for child in element:
+        # tostring() includes the child's tail text, as innerHTML does
+        parts.append(etree.tostring(child, encoding="unicode", method="html"))
+    return ''.join(parts)
+
+
+def extract_from_html(html, selectors):
+    """
+    Evaluate a `selectors` spec (key / selector / full_html) against raw HTML.
+
+    Returns the same `content` dict the Playwright crawlers build.
+    """
+    extracted_data = {}
+    try:
+        document = lxml.html.document_fromstring(html) if html and html.strip() else None
+    except (etree.ParserError, ValueError):
+        document = None
+
+    for selector_item in selectors:
+        field = selector_item.get("key")
+        selector = selector_item.get("selector")
+        full_html = selector_item.get("full_html", False)
+
+        if not field or not selector:
+            continue
+
+        if document is None:
+            extracted_data[field] = []
+            continue
+
+        try:
+            elements = _compile(selector)(document)
+        except Exception:
+            extracted_data[field] = []
+            continue
+
+        field_contents = []
+        for element in elements:
+            try:
+                if full_html:
+                    content = _inner_html(element)
+                else:
+                    content = normalize_text(element.text_content())
+                if content:
+                    field_contents.append(content.strip())
+            except Exception:
+                continue
+
+        extracted_data[field] = field_contents
+
+    return extracted_data
+
+
+async def _extract_with_handles(page, selector, full_html):
+    elements = await page.query_selector_all(selector)
+    field_contents = []
+    for element in elements:
+        try:
+            if full_html:
+                content = await element.inner_html()
+            else:
+                content = normalize_text(await element.text_content())
+            if content:
+                field_contents.append(content.strip())
+        except Exception:
+            continue
+    return field_contents
+
+
+_pool = None
+
+
+def _extraction_pool():
+    global _pool
+    if _pool is None:
+        # spawn: forking would copy the runtime thread and open SQLite handles
+        _pool = ProcessPoolExecutor(
+            max_workers=EXTRACT_WORKERS or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def extract_in_pool(html, selectors):
+    """Run `extract_from_html` in the extraction process pool; returns an asyncio future."""
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(_extraction_pool(), extract_from_html, html, selectors)
+
+
+async def extract_from_page(page, selectors):
+    """
+    Evaluate a `selectors` spec against a live page in a single `evaluate` call.
+
+    Returns the `content` dict sent to Laravel: one list of values per key.
+    """
+    spec = [
+        {"key": item.get("key"), "selector": item.get("selector"), "full_html": bool(item.get("full_html", False))}
+        for item in selectors
+        if item.get("key") and item.get("selector")
+    ]
+    if not spec:
+        return {}
+
+    result = await page.evaluate(_EXTRACT_JS, {"selectors": spec, "ignored": list(IGNORED_LINES)})
+    extracted_data = result["content"]
+
+    for item in spec:
+        if item["key"] not in result["fallback"]:
+            continue
+        try:
+            extracted_data[item["key"]] = await _extract_with_handles(page, item["selector"], item["full_html"])
+        except Exception:
+            extracted_data[item["key"]] = []
+
+    # Keep the key order of the spec, as the per-field loops did
+    return {item["key"]: extracted_data.get(item["key"], []) for item in spec}
+
+
+def looks_js_rendered(html, content):
+    """Guess whether an HTTP-fetched page needs a browser to show its data."""
+    if content:
+        # Selectors were given: the page is fine as long as one of them matched
+        return not any(content.values())
+    try:
+        document = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return True
+    for element in document.xpath('//script|//style|//noscript|//template'):
+        element.drop_tree()
+    body_text = ''.join(document.xpath('//body//text()')).strip()
+    return len(body_text) < 200
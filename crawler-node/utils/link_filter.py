@@ -0,0 +1,115 @@
+import fnmatch
+import re
+from urllib.parse import urlsplit
+
+try:
+    import ahocorasick
+except ImportError:  # optional, a combined regex is used instead
+    ahocorasick = None
+
+
+class _Matcher:
+    """
+    One compiled matcher for a group of rules: substrings go into an
+    Aho-Corasick automaton (or one escaped alternation without
+    pyahocorasick), regexes and globs into a single combined regex.
+    """
+
+    def __init__(self, substrings, patterns):
+        self.automaton = None
+        self.regex = None
+
+        if substrings and ahocorasick is not None:
+            self.automaton = ahocorasick.Automaton()
+            for substring in substrings:
+                self.automaton.add_word(substring, substring)
+            self.automaton.make_automaton()
+        elif substrings:
+            patterns = [re.escape(substring) for substring in substrings] + patterns
+
+        if patterns:
+            self.regex = re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+    def matches(self, link):
+        if self.automaton is not None:
+            for _ in self.automaton.iter(link):
+                return True
+        return self.regex is not None and self.regex.search(link) is not None
+
+
+class _Group:
+    def __init__(self):
+        self.substrings = []
+        self.patterns = []
+
+    def add(self, kind, pattern):
+        if kind == "regex":
+            self.patterns.append(pattern)
+        elif kind == "glob":
+            self.patterns.append(fnmatch.translate(pattern))
+        else:
+            self.substrings.append(pattern)
+
+    def compile(self):
+        return _Matcher(self.substrings, self.patterns)
+
+
+class LinkFilter:
+    """
+    Compiled form of `link_filter_rules`.
+
+    A rule is either a plain string (substring include, as before) or a dict:
+
+        {"pattern": "...", "type": "substring" | "regex" | "glob",
+         "exclude": false, "host": "example.com", "path_prefix": "/blog"}
+
+    A link is kept when it matches an include rule (or no include rules
+    exist) and no exclude rule. Rules with `host` / `path_prefix` only apply
+    to links inside that scope. Rules are grouped by scope and compiled once,
+    so a link costs one automaton/regex pass per scope instead of one check
+    per rule.
+    """
+
+    def __init__(self, rules):
+        groups = {}
+        for rule in rules or []:
+            if isinstance(rule, str):
+                rule = {"pattern": rule}
+            if not isinstance(rule, dict) or not rule.get("pattern"):
+                continue
+            scope = ((rule.get("host") or "").lower() or None, rule.get("path_prefix") or None)
+            key = (bool(rule.get("exclude")), scope)
+            groups.setdefault(key, _Group()).add(rule.get("type", "substring"), rule["pattern"])
+
+        self.has_includes = any(not exclude for exclude, _ in groups)
+        self.includes = [(scope, group.compile()) for (exclude, scope), group in groups.items() if not exclude]
+        self.excludes = [(scope, group.compile()) for (exclude, scope), group in groups.items() if exclude]
+        self.scoped = any(scope != (None, None) for _, scope in groups)
+
+    @staticmethod
+    def _in_scope(scope, host, path):
+        scope_host, path_prefix = scope
+        if scope_host and host != scope_host and not host.endswith("." + scope_host):
+            return False
+        return not path_prefix or path.startswith(path_prefix)
+
+    def _any(self, matchers, link, host, path):
+        return any(
+            matcher.matches(link)
+            for scope, matcher in matchers
+            if scope == (None, None) or self._in_scope(scope, host, path)
+        )
+
+    def allows(self, link):
+        host, path = "", ""
+        if self.scoped:
+            parts = urlsplit(link)
+            host, path = (parts.hostname or ""), parts.path
+        if self.excludes and self._any(self.excludes, link, host, path):
+            return False
+        return not self.has_includes or self._any(self.includes, link, host, path)
+
+    def apply(self, links):
+        if not self.has_includes and not self.excludes:
+            return list(links)
+        return [link for link in links if self.allows(link)]
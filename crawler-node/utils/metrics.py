@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import psutil
+from prometheus_client import Counter, Gauge, Histogram
+
+from config import MEMORY_LIMIT_MB, ERROR_RATE_WINDOW, METRICS_MAX_HOSTS
+
+_PHASE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60, 120)
+_BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7)
+
+JOBS = Counter(
+    "crawler_jobs_total", "Crawl jobs received by /crawl", ["type", "outcome"]
+)
+BROWSER_LAUNCH = Histogram(
+    "crawler_browser_launch_seconds", "Time to launch a pooled Chromium", buckets=_PHASE_BUCKETS
+)
+PHASE = Histogram(
+    "crawler_phase_seconds", "Time spent per crawl phase", ["type", "host", "phase"], buckets=_PHASE_BUCKETS
+)
+ERRORS = Counter(
+    "crawler_errors_total", "Page and job errors by exception class", ["type", "error"]
+)
+SEND_LATENCY = Histogram(
+    "crawler_send_seconds", "Latency of result POSTs to Laravel", buckets=_PHASE_BUCKETS
+)
+RESULT_BYTES = Histogram(
+    "crawler_result_bytes", "Encoded size of result payloads", ["type"], buckets=_BYTES_BUCKETS
+)
+HOST_BACKOFFS = Counter(
+    "crawler_host_backoffs_total", "Per-host rate limiter backoffs by cause", ["host", "cause"]
+)
+ACTIVE_BROWSERS = Gauge("crawler_active_browsers", "Connected pooled browsers")
+ACTIVE_PAGES = Gauge("crawler_active_pages", "Open pages across pooled browsers")
+QUEUED_JOBS = Gauge("crawler_queued_jobs", "Jobs waiting for a worker slot")
+RUNNING_JOBS = Gauge("crawler_running_jobs", "Jobs currently running")
+OUTBOX_PENDING = Gauge("crawler_outbox_pending", "Results waiting for delivery")
+NODE_RSS = Gauge("crawler_node_rss_bytes", "Resident memory of the node and its browser processes")
+
+
+_labelled_hosts = set()
+_labelled_hosts_lock = threading.Lock()
+
+
+def host_label(host):
+    """
+    `host` as a metric label while fewer than METRICS_MAX_HOSTS hosts have
+    their own series, "other" after that, so off-domain crawls cannot grow
+    the series without bound.
+    """
+    if not host:
+        return "unknown"
+    with _labelled_hosts_lock:
+        if host in _labelled_hosts:
+            return host
+        if len(_labelled_hosts) < METRICS_MAX_HOSTS:
+            _labelled_hosts.add(host)
+            return host
+    return "other"
+
+
+def host_of(url):
+    if not isinstance(url, str):
+        return "unknown"
+    return host_label(urlparse(url).hostname)
+
+
+@contextmanager
+def phase_timer(crawler_type, url, phase):
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE.labels(crawler_type or "unknown", host_of(url), phase).observe(time.perf_counter() - started_at)
+
+
+def record_error(crawler_type, error):
+    ERRORS.labels(crawler_type or "unknown", error.__class__.__name__).inc()
+
+
+def node_rss():
+    return process_tree_rss()
+
+
+def process_tree_rss(pid=None):
+    """RSS of a process (this one by default) plus all its descendants, in bytes."""
+    try:
+        process = psutil.Process(pid)
+        rss = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return rss
+    except psutil.Error:
+        return 0
+
+
+def memory_limit():
+    """Memory available to the node: MEMORY_LIMIT_MB, the cgroup limit, or host memory."""
+    if MEMORY_LIMIT_MB:
+        return MEMORY_LIMIT_MB * 1024 * 1024
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            # cgroup v1 reports "no limit" as a huge number
+            if value != "max" and int(value) < psutil.virtual_memory().total:
+                return int(value)
+        except (OSError, ValueError):
+            continue
+    return psutil.virtual_memory().total
+
+
+class RecentResults:
+    """Sliding window of result outcomes, for the error rate on /health."""
+
+    def __init__(self, window=ERROR_RATE_WINDOW):
+        self.window = window
+        self._events = deque()
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        while self._events and now - self._events[0][0] > self.window:
+            self._events.popleft()
+
+    def record(self, is_error):
+        now = time.monotonic()
+        with self._lock:
+            self._events.append((now, is_error))
+            self._prune(now)
+
+    def error_rate(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            if not self._events:
+                return 0.0
+            return sum(1 for _, is_error in self._events if is_error) / len(self._events)
+
+
+recent_results = RecentResults()
+
+NODE_RSS.set_function(node_rss)
@@ -0,0 +1,134 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from config import OUTBOX_PATH, OUTBOX_BACKOFF_BASE, OUTBOX_BACKOFF_MAX
+
+# Pending rows with no earlier pending row of the same job
+_JOB_HEAD = (
+    "(job IS NULL OR NOT EXISTS (SELECT 1 FROM results earlier"
+    " WHERE earlier.dead = 0 AND earlier.job = results.job AND earlier.id < results.id{}))"
+)
+
+
+def _not_in(column, values):
+    if not values:
+        return ""
+    return f" AND ({column} IS NULL OR {column} NOT IN ({', '.join('?' * len(values))}))"
+
+
+class Outbox:
+    """
+    SQLite-backed queue of encoded results waiting for delivery.
+
+    Results are written here before any delivery attempt and deleted once
+    Laravel accepted them, so nothing crawled is lost on a Laravel outage or
+    a node restart. Rows of one job are handed out strictly in insertion
+    order, which keeps its is_last result behind the rest of the job; a row
+    backing off only holds up later rows of its own job.
+    """
+
+    def __init__(self, path=OUTBOX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " body BLOB NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " next_attempt REAL NOT NULL DEFAULT 0,"
+            " dead INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL,"
+            " job TEXT)"
+        )
+        if "job" not in [column[1] for column in self._db.execute("PRAGMA table_info(results)")]:
+            self._db.execute("ALTER TABLE results ADD COLUMN job TEXT")  # outbox from an older version
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_dead_id ON results (dead, id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_job_id ON results (job, id)")
+
+    def append(self, body, job=None):
+        """Queue `body`; rows sharing a `job` are delivered in order, rows without one in any order."""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO results (body, created_at, job) VALUES (?, ?, ?)", (body, time.time(), job)
+            )
+            return cursor.lastrowid
+
+    def head(self, limit, max_bytes, busy_rows=(), busy_jobs=()):
+        """
+        Oldest deliverable rows as (id, attempts, created_at, body, job): rows due
+        for an attempt that no backing-off row of their job is waiting in
+        front of. A row that already failed is handed out on its own, so it
+        cannot fail a batch of fresh rows with it. Rows in `busy_rows` and
+        rows of `busy_jobs` are being delivered by another worker and skipped.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, job, attempts, created_at, body FROM results"
+                " WHERE dead = 0 AND next_attempt <= ? AND " + _JOB_HEAD.format(" AND earlier.next_attempt > ?") +
+                _not_in("id", busy_rows) + _not_in("job", busy_jobs) +
+                " ORDER BY id LIMIT ?",
+                (now, now, *busy_rows, *busy_jobs, limit)
+            ).fetchall()
+
+        batch, size, held_back = [], 0, set()
+        for row_id, job, attempts, created_at, body in rows:
+            if job is not None and job in held_back:
+                continue
+            if batch and attempts:
+                if job is not None:
+                    held_back.add(job)  # its later rows must wait for it
+                continue
+            if batch and size + len(body) > max_bytes:
+                break
+            batch.append((row_id, attempts, created_at, body, job))
+            size += len(body)
+            if attempts:
+                break
+        return batch
+
+    def next_attempt_in(self, busy_rows=()):
+        """Seconds until the next row outside `busy_rows` may be attempted, None if there is none."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(next_attempt) FROM results WHERE dead = 0 AND " + _JOB_HEAD.format("") +
+                _not_in("id", busy_rows),
+                tuple(busy_rows)
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def ack(self, ids):
+        with self._lock:
+            self._db.executemany("DELETE FROM results WHERE id = ?", [(i,) for i in ids])
+
+    def retry(self, ids, attempts):
+        # Exponential backoff with jitter, shared by the whole batch
+        backoff = min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * (2 ** attempts))
+        next_attempt = time.time() + backoff / 2 + random.uniform(0, backoff / 2)
+        with self._lock:
+            self._db.executemany(
+                "UPDATE results SET attempts = ?, next_attempt = ? WHERE id = ?",
+                [(attempts + 1, next_attempt, i) for i in ids]
+            )
+
+    def bury(self, ids):
+        """Keep rows that can never be delivered for inspection, out of the queue."""
+        with self._lock:
+            self._db.executemany("UPDATE results SET dead = 1 WHERE id = ?", [(i,) for i in ids])
+
+    def counts(self):
+        with self._lock:
+            pending, dead = self._db.execute(
+                "SELECT COALESCE(SUM(dead = 0), 0), COALESCE(SUM(dead = 1), 0) FROM results"
+            ).fetchone()
+        return pending, dead
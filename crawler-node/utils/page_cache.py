@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import PAGE_CACHE_PATH, PAGE_CACHE_TTL, PAGE_CACHE_MAX_ENTRIES
+
+
+def content_hash(content):
+    encoded = json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def cache_key(crawler_type, url, spec):
+    """
+    Entries are per crawler type and `spec`: everything besides the url that
+    the content depends on (selectors, link rules, the logged-in account, ...).
+    """
+    return f"{crawler_type}:{content_hash(spec)[:16]}:{url}"
+
+
+class PageCache:
+    """
+    Cache of HTTP validators (ETag / Last-Modified) and the last extracted
+    content per `cache_key`, with a TTL and an LRU bound on the number of
+    entries.
+    """
+
+    def __init__(self, path=PAGE_CACHE_PATH, ttl=PAGE_CACHE_TTL, max_entries=PAGE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._db = None
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Opened on first use so jobs that never cache never touch the disk
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            columns = [column[1] for column in self._db.execute("PRAGMA table_info(pages)")]
+            if columns and "key" not in columns:
+                self._db.execute("DROP TABLE pages")  # keyed by url alone, start over
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " key TEXT PRIMARY KEY,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " final_url TEXT,"
+                " content TEXT,"
+                " content_hash TEXT,"
+                " stored_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+            self._count = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return self._db
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            row = db.execute(
+                "SELECT etag, last_modified, final_url, content, content_hash, stored_at FROM pages WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl and now - row[5] > self.ttl:
+                db.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self._count -= 1
+                return None
+            db.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (now, key))
+
+        etag, last_modified, final_url, content, digest, _ = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "final_url": final_url,
+            "content": json.loads(content) if content is not None else None,
+            "content_hash": digest,
+        }
+
+    def put(self, key, final_url, content, etag=None, last_modified=None):
+        """Store the latest result under `key`; returns True when its content hash is unchanged."""
+        digest = content_hash(content)
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT content_hash FROM pages WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO pages"
+                " (key, etag, last_modified, final_url, content, content_hash, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, final_url, json.dumps(content, ensure_ascii=False), digest, now, now)
+            )
+            if row is None:
+                self._count += 1
+            excess = self._count - self.max_entries if self.max_entries else 0
+            if excess > 0:
+                # Evict the least recently used entries
+                db.execute(
+                    "DELETE FROM pages WHERE key IN (SELECT key FROM pages ORDER BY accessed_at LIMIT ?)",
+                    (excess,)
+                )
+                self._count -= excess
+        return row is not None and row[0] == digest
+
+
+def conditional_headers(entry):
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+page_cache = PageCache()
@@ -0,0 +1,94 @@
+import gzip
+
+import orjson
+
+from config import SENDER_COMPRESSION, SENDER_COMPRESS_MIN_BYTES, SENDER_MAX_BODY_BYTES
+
+try:
+    import zstandard
+except ImportError:  # optional, gzip is used instead
+    zstandard = None
+
+if SENDER_COMPRESSION == "zstd" and zstandard is None:
+    print("⚠️ SENDER_COMPRESSION=zstd but the zstandard package is missing, using gzip")
+
+_zstd_compressor = zstandard.ZstdCompressor(level=3) if zstandard is not None else None
+
+
+def encode(payload):
+    # orjson encodes straight to bytes, without an intermediate str
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _split_content(content, budget):
+    """
+    Split a `content` dict ({key: [values]}) or list into parts whose encoded
+    size stays under `budget` bytes. A single value larger than the budget
+    gets a part of its own.
+
+    The first part of a dict has every key, with an empty list for lists
+    whose values all went to later parts; values that are not lists are
+    kept whole in the first part.
+    """
+    if isinstance(content, dict):
+        current = {key: [] if isinstance(values, list) else values for key, values in content.items()}
+        items = [(key, value) for key, values in content.items() if isinstance(values, list) for value in values]
+        filled = any(not isinstance(values, list) for values in content.values())
+    else:
+        current = []
+        items = [(None, value) for value in content]
+        filled = False
+
+    parts, size = [], len(encode(current))
+    for key, value in items:
+        value_size = len(encode(value)) + (len(encode(key)) if key is not None else 0) + 4
+        if filled and size + value_size > budget:
+            parts.append(current)
+            current, size = ({} if isinstance(content, dict) else []), 0
+        if isinstance(content, dict):
+            current.setdefault(key, []).append(value)
+        else:
+            current.append(value)
+        size += value_size
+        filled = True
+    parts.append(current)
+    return parts
+
+
+def encode_result(payload, max_bytes=SENDER_MAX_BODY_BYTES):
+    """
+    Encode a result payload into one or more JSON bodies.
+
+    Payloads over `max_bytes` are split by their `content` values into chunks
+    that repeat every other field (original_url, meta, ...) and carry
+    `chunk_index` / `chunk_count`; only the final chunk keeps the payload's
+    `is_last`.
+    """
+    body = encode(payload)
+    content = payload.get("content")
+    if len(body) <= max_bytes or not content or not isinstance(content, (dict, list)):
+        return [body]
+
+    envelope = {key: value for key, value in payload.items() if key != "content"}
+    budget = max(1, max_bytes - len(encode(envelope)) - 64)
+    parts = _split_content(content, budget)
+    del body
+
+    bodies = []
+    for index, part in enumerate(parts):
+        chunk = dict(envelope)
+        chunk["content"] = part
+        chunk["chunk_index"] = index
+        chunk["chunk_count"] = len(parts)
+        chunk["is_last"] = bool(payload.get("is_last")) and index == len(parts) - 1
+        bodies.append(encode(chunk))
+    return bodies
+
+
+def compress(body, method=SENDER_COMPRESSION):
+    """Returns (body, content_encoding or None)."""
+    if method in (None, "", "none") or len(body) < SENDER_COMPRESS_MIN_BYTES:
+        return body, None
+    if method == "zstd" and _zstd_compressor is not None:
+        return _zstd_compressor.compress(body), "zstd"
+    return gzip.compress(body, compresslevel=5), "gzip"
@@ -1,15 +1,204 @@
+import threading
+import time
+from collections import deque
+
 import requests
-from config import LARAVEL_API_URL, LARAVEL_API_TOKEN
+from requests.adapters import HTTPAdapter
 
-def send_result_to_laravel(payload):
-    try:
-        headers = {
+from config import (
+    LARAVEL_API_URL, LARAVEL_API_TOKEN, SENDER_POOL_SIZE, SENDER_TIMEOUT,
+    SENDER_BATCH_MAX, SENDER_BATCH_MAX_BYTES, SENDER_LINGER_MS, OUTBOX_MAX_ATTEMPTS, OUTBOX_MAX_AGE
+)
+from utils.outbox import Outbox
+from utils.payload import encode_result, compress
+from utils.metrics import SEND_LATENCY, RESULT_BYTES, recent_results
+
+# Client errors worth retrying, any other 4xx fails the same way every time
+_RETRYABLE_STATUSES = {408, 425, 429}
+
+
+class ResultSender:
+    """
+    Delivers crawl results to Laravel from `workers` background threads.
+
+    Results are encoded once (split into numbered chunks when larger than
+    SENDER_MAX_BODY_BYTES), written to the durable outbox and posted over a
+    keep-alive connection pool, compressed per SENDER_COMPRESSION. With `batch_max` > 1, up to `batch_max`
+    results (and at most `batch_max_bytes`) queued within `linger_ms` of each
+    other are posted together as {"results": [...]}. Failed deliveries stay in
+    the outbox and are retried with exponential backoff, also after a restart,
+    until OUTBOX_MAX_ATTEMPTS or OUTBOX_MAX_AGE is reached; a result that keeps
+    failing only holds up the rest of its own job. Workers post different jobs
+    in parallel, but never two batches of the same job at once.
+    """
+
+    def __init__(self, batch_max=SENDER_BATCH_MAX, batch_max_bytes=SENDER_BATCH_MAX_BYTES, linger_ms=SENDER_LINGER_MS, outbox=None, workers=SENDER_POOL_SIZE):
+        self.workers = max(1, workers)
+        self.batch_max = max(1, batch_max)
+        self.batch_max_bytes = batch_max_bytes
+        self.linger = linger_ms / 1000
+        self._outbox = outbox
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._claim_lock = threading.Lock()
+        self._in_flight = {}  # row id -> job of every row a worker is posting
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=100)
+        self._delivered = 0
+        self._failed = 0
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({
             "Authorization": f"Bearer {LARAVEL_API_TOKEN}",
             "Content-Type": "application/json"
-        }
-        response = requests.post(LARAVEL_API_URL, json=payload, headers=headers, timeout=20)
-        response.raise_for_status()
+        })
+
+    @property
+    def outbox(self):
+        if self._outbox is None:
+            self._outbox = Outbox()
+        return self._outbox
+
+    def start(self):
+        """Start delivering, including anything left in the outbox by a previous run."""
+        with self._start_lock:
+            if not self._threads:
+                self.outbox  # open the database before the threads need it
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._run, name=f"result-sender-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+
+    def enqueue(self, payload):
+        self.start()
+        bodies = encode_result(payload)
+        RESULT_BYTES.labels(payload.get("type") or "unknown").observe(sum(len(body) for body in bodies))
+        recent_results.record((payload.get("status_code") or 200) >= 500)
+        for body in bodies:
+            self.outbox.append(body, payload.get("job_id"))
+        self._wakeup.set()
+        return True
+
+    def _head(self):
+        # Caller holds _claim_lock. Rows and jobs another worker is posting are skipped
+        busy_jobs = {job for job in self._in_flight.values() if job is not None}
+        return self.outbox.head(self.batch_max, self.batch_max_bytes, list(self._in_flight), list(busy_jobs))
+
+    def _claim(self):
+        with self._claim_lock:
+            batch = self._head()
+            for row_id, _, _, _, job in batch:
+                self._in_flight[row_id] = job
+        return batch
+
+    def _release(self, batch):
+        with self._claim_lock:
+            for row_id, _, _, _, _ in batch:
+                self._in_flight.pop(row_id, None)
+        self._wakeup.set()  # rows of the same job may be deliverable now
+
+    def _next_batch(self):
+        while True:
+            self._wakeup.clear()
+            if self.linger and self.batch_max > 1:
+                with self._claim_lock:
+                    ready = self._head()
+                if ready and len(ready) < self.batch_max:
+                    # Give the rest of a burst a moment to join the batch
+                    time.sleep(self.linger)
+            batch = self._claim()
+            if batch:
+                return batch
+
+            with self._claim_lock:
+                wait = self.outbox.next_attempt_in(list(self._in_flight))
+            self._wakeup.wait(timeout=wait if wait is not None else None)
+
+    def _run(self):
+        while True:
+            try:
+                batch = self._next_batch()
+            except Exception as e:
+                print(f"❌ Outbox read failed: {e}")
+                time.sleep(1)
+                continue
+
+            try:
+                self._deliver(batch)
+            finally:
+                self._release(batch)
+
+    def _deliver(self, batch):
+        ids = [row_id for row_id, _, _, _, _ in batch]
+        attempts = max(attempts for _, attempts, _, _, _ in batch)
+        created_at = min(created_at for _, _, created_at, _, _ in batch)
+        if len(batch) == 1:
+            body = batch[0][3]
+        else:
+            body = b'{"results":[' + b','.join(body for _, _, _, body, _ in batch) + b']}'
+        body, encoding = compress(body)
+        headers = {"Content-Encoding": encoding} if encoding else None
+
+        started_at = time.monotonic()
+        try:
+            response = self._session.post(LARAVEL_API_URL, data=body, headers=headers, timeout=SENDER_TIMEOUT)
+            response.raise_for_status()
+            self.outbox.ack(ids)
+            latency = time.monotonic() - started_at
+            SEND_LATENCY.observe(latency)
+            with self._stats_lock:
+                self._delivered += len(batch)
+                self._latencies.append(latency)
+        except Exception as e:
+            with self._stats_lock:
+                self._failed += len(batch)
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            permanent = status is not None and 400 <= status < 500 and status not in _RETRYABLE_STATUSES
+            expired = (
+                (OUTBOX_MAX_ATTEMPTS and attempts + 1 >= OUTBOX_MAX_ATTEMPTS)
+                or (OUTBOX_MAX_AGE and time.time() - created_at >= OUTBOX_MAX_AGE)
+            )
+            if permanent or expired:
+                print(f"❌ Failed to send result to Laravel, giving up: {e}")
+                self.outbox.bury(ids)
+            else:
+                print(f"❌ Failed to send result to Laravel, will retry: {e}")
+                self.outbox.retry(ids, attempts)
+
+    def flush(self, timeout=None):
+        """Wait until the outbox is drained, or `timeout` seconds passed."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while self.outbox.counts()[0]:
+            if deadline and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
         return True
+
+    def stats(self):
+        pending, dead = self.outbox.counts()
+        with self._stats_lock:
+            latencies = list(self._latencies)
+            return {
+                "queued": pending,
+                "dead": dead,
+                "delivered": self._delivered,
+                "failed": self._failed,
+                "avg_latency_ms": round(1000 * sum(latencies) / len(latencies), 1) if latencies else 0.0,
+                "max_latency_ms": round(1000 * max(latencies), 1) if latencies else 0.0,
+            }
+
+
+result_sender = ResultSender()
+
+
+def send_result_to_laravel(payload):
+    # Non-blocking: the result is stored in the outbox and posted by the sender threads
+    try:
+        return result_sender.enqueue(payload)
     except Exception as e:
         print(f"❌ Failed to send result to Laravel: {e}")
         return False